@@ -1,7 +1,9 @@
 import streamlit as st
 import json
+import logging
 import pandas as pd
 from gemma2_recommender import get_gemma_recommendation
+from exercise_search import get_exercise_search_index
 
 def load_user_data():
     user_data = st.session_state.get("user_data", {})
@@ -33,6 +35,41 @@ def display_recommendation(recommendation, title):
             st.text(recommendation)
             return
 
+def exercise_terms_input(label, key, placeholder):
+    """
+    📌 쉼표로 구분한 운동 입력을 운동 카탈로그의 운동명으로 맞춥니다. (오타 허용 검색)
+    확정되지 않은 입력은 비슷한 운동 제안 중에서 고를 수 있고, 고르지 않으면 입력 그대로 둡니다.
+    반환: (운동명/입력 목록, 확정된 운동 id 목록)
+    """
+    raw_terms = st.text_input(label, "", key=key, placeholder=placeholder)
+    # 같은 입력을 두 번 적어도 한 번만 처리 (입력 순서 유지, 위젯 key 중복 방지)
+    terms = list(dict.fromkeys(term.strip() for term in raw_terms.split(',') if term.strip()))
+    try:
+        index = get_exercise_search_index()
+    except (OSError, ValueError) as e:
+        logging.error(f"🚨 운동명 검색 색인 생성 실패: {e}")
+        return terms, []
+
+    names, exercise_ids = [], []
+    for term in terms:
+        exercise_id = index.resolve(term)
+        if exercise_id is None:
+            suggestions = [suggestion_id for suggestion_id, _, _ in index.search(term)]
+            if suggestions:
+                exercise_id = st.selectbox(
+                    f"🔎 '{term}' — 혹시 이 운동인가요?", [None, *suggestions],
+                    format_func=lambda i, term=term: f"{term} (입력 그대로)" if i is None else index.names[i],
+                    key=f"{key}_{term}",
+                )
+        elif index.names[exercise_id] != term:
+            st.caption(f"✅ '{term}' → {index.names[exercise_id]}")
+        if exercise_id is None:
+            names.append(term)
+        elif exercise_id not in exercise_ids:  # 다른 오타가 같은 운동으로 확정된 경우 한 번만
+            names.append(index.names[exercise_id])
+            exercise_ids.append(exercise_id)
+    return names, exercise_ids
+
 def display_ai_coach_page():
     st.header("🏋️‍♂️ AI 건강 코치")
     user_data = load_user_data()
@@ -73,6 +110,7 @@ def display_ai_coach_page():
         # 운동 관련 설정
         fitness_level = st.select_slider("💪 현재 체력 수준", options=["매우 낮음", "낮음", "보통", "높음", "매우 높음"])
         
+        # 제한 사항은 주로 신체 부위라 운동명 검색 없이 입력 그대로 사용
         restricted_exercises = st.text_input("⚠️ 운동 제한 사항 (쉼표로 구분)", "", key="restricted_exercises", placeholder="예: 허리, 무릎, 발목")
         restricted_exercises = [exercise.strip() for exercise in restricted_exercises.split(',') if exercise.strip()]
         
@@ -81,6 +119,9 @@ def display_ai_coach_page():
                                               "피트니스 댄스", "싸이클링", "수영", "러닝", "등산",
                                               "고강도 인터벌 트레이닝", "요가", "필라테스", "크로스핏"])
         
+        preferred_exercises, preferred_exercise_ids = exercise_terms_input(
+            "👍 좋아하는 운동 종목 (쉼표로 구분, 오타 허용)", "preferred_exercises", "예: 배드민턴, 자전거타기, 수영")
+        
         workout_frequency = st.slider("🗓️ 주간 운동 가능 일수", min_value=1, max_value=7, value=3)
         
         workout_duration = st.slider("⏱️ 1회 운동 가능 시간 (분)", min_value=10, max_value=120, value=45, step=5)
@@ -99,6 +140,8 @@ def display_ai_coach_page():
         "restricted_exercises": restricted_exercises,
         "fitness_level": fitness_level,
         "exercise_preference": exercise_preference,
+        "preferred_exercises": preferred_exercises,
+        "preferred_exercise_ids": preferred_exercise_ids,
         "workout_frequency": workout_frequency,
         "workout_duration": workout_duration,
         "workout_location": workout_location,
@@ -117,6 +160,7 @@ def display_ai_coach_page():
         ("운동 제한", restricted_exercises),
         ("체력 수준", [fitness_level]),
         ("선호 운동", exercise_preference),
+        ("선호 운동 종목", preferred_exercises),
         ("주간 운동 횟수", [workout_frequency]),
         ("운동 시간", [f"{workout_duration}분"]),
         ("운동 장소", workout_location),
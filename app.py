@@ -2,16 +2,9 @@ import streamlit as st
 import json
 import os
 from sidebar import get_selected_menu
-from home import display_home_page
-from prediction import display_prediction_page
-from visualization import display_visualization_page
-from ai_coach import display_ai_coach_page
-from user_input import get_user_input
-from model_loader import model_exercise, model_food 
-from user_data_utils import save_user_data, load_user_data
+from page_registry import get_page
+from profile_tracker import track_profile
 from login import display_auth_page, check_login_status, logout  
-from info import display_info_page
-from login_visualization import display_login_visualization 
 
 # ✅ 세션 초기화 함수
 def initialize_session():
@@ -68,13 +61,13 @@ def app():
     menu_option = get_selected_menu()
 
     if menu_option == "홈 화면":
-        display_home_page()
+        get_page("홈 화면")()
 
     elif menu_option == "내 정보":  # ✅ 로그인한 사용자 전용 메뉴 추가
         if not st.session_state["logged_in"]:
             st.warning("⚠️ 로그인 후 접근할 수 있습니다.")
         else:
-            display_login_visualization()  # ✅ 문제 해결
+            get_page("내 정보")()  # ✅ 문제 해결
 
     elif menu_option == "건강 정보 입력":
         existing_data = st.session_state.get("user_data", {})
@@ -86,27 +79,30 @@ def app():
                 existing_data = {}
 
         user_id = st.session_state["nickname"]
+        get_user_input = get_page("건강 정보 입력")
         user_data = get_user_input(existing_data=existing_data, user_id=user_id)
 
+        # ✅ 폼을 제출한 경우에만 저장 (내용이 바뀌지 않았으면 쓰지 않음)
         if user_data:
-            st.session_state["user_data"] = json.dumps(user_data)
-            save_user_data(user_id, user_data)
-            st.success("✅ 사용자 정보가 저장되었습니다!")
+            if track_profile(user_id, user_data):
+                st.success("✅ 사용자 정보가 저장되었습니다!")
+            else:
+                st.info("ℹ️ 변경된 내용이 없습니다.")
 
     elif menu_option == "예측하기":
-        display_prediction_page()
+        get_page("예측하기")()
 
     elif menu_option == "데이터 시각화":
-        display_visualization_page()
+        get_page("데이터 시각화")()
 
     elif menu_option == "AI 건강 코치":
         if not st.session_state.get("user_data"):
             st.warning("⚠️ 건강 정보를 입력한 후 AI 코치를 이용해주세요.")
         else:
-            display_ai_coach_page()
+            get_page("AI 건강 코치")()
 
     elif menu_option == "개발 과정":
-        display_info_page()
+        get_page("개발 과정")()
 
 # ✅ 앱 실행
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatchScheduler:
+    """
+    📌 여러 Streamlit 세션의 예측 요청을 모아 한 번의 forward pass로 처리하는 스케줄러.
+    max_batch_size 행이 모이거나 첫 요청 후 max_wait_ms가 지나면 배치를 실행하고,
+    각 요청의 Future에 결과 행을 돌려줍니다.
+    """
+
+    def __init__(self, score_fn, max_batch_size=64, max_wait_ms=5.0, metrics_window=10000):
+        # score_fn: (N, F) float32 배열 → (N, ...) 배열
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._waits = deque(maxlen=metrics_window)
+        self._worker = threading.Thread(target=self._run, name="micro-batch-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, features):
+        """(N, F) 또는 (F,) 피처를 큐에 넣고 결과를 받을 Future를 반환합니다."""
+        future = Future()
+        self._queue.put((np.atleast_2d(features), future, time.perf_counter()))
+        return future
+
+    def score(self, features, timeout=None):
+        """submit 후 결과를 기다려 반환합니다."""
+        return self.submit(features).result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        batch, rows = [first], len(first[0])
+        deadline = first[2] + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch, rows
+
+    def _run(self):
+        while True:
+            batch, rows = self._collect()
+            started = time.perf_counter()
+            with self._metrics_lock:
+                self._batch_sizes[rows] += 1
+                self._waits.extend(started - enqueued for _, _, enqueued in batch)
+            try:
+                outputs = self.score_fn(np.concatenate([features for features, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for features, future, _ in batch:
+                future.set_result(outputs[offset:offset + len(features)])
+                offset += len(features)
+
+    def metrics(self):
+        """큐 길이, 배치 크기 히스토그램, 대기 시간 p50/p99(ms)"""
+        with self._metrics_lock:
+            waits = np.asarray(self._waits, dtype=np.float64) * 1000
+            histogram = dict(sorted(self._batch_sizes.items()))
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batch_size_histogram": histogram,
+            "wait_p50_ms": round(float(np.percentile(waits, 50)), 3) if len(waits) else 0.0,
+            "wait_p99_ms": round(float(np.percentile(waits, 99)), 3) if len(waits) else 0.0,
+        }
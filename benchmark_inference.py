@@ -0,0 +1,76 @@
+"""
+📊 추론 모드별 처리량 및 정확도 편차 리포트
+
+예측 히스토리(data/predictions.csv + 예측 로그)의 모든 사용자에 대해 fp32 / bf16 / int8 모드의
+처리량(rows/s)과 fp32 대비 점수 차이를 비교합니다.
+
+실행: python benchmark_inference.py
+"""
+import time
+import numpy as np
+import pandas as pd
+from model_loader import INFERENCE_MODES, apply_inference_mode, get_fp32_models
+from prediction import encode_features, run_model
+from prediction_store import load_predictions
+
+# 처리량 측정용 반복 횟수 (전체 사용자 행을 이만큼 복제하여 측정)
+THROUGHPUT_REPEAT = 300
+# 허용 기준 1: fp32 원시 출력 대비 최대 차이 / fp32 출력 최대 크기
+MAX_RELATIVE_DRIFT = 0.01
+# 허용 기준 2: int(base_score)가 fp32와 같은 사용자 비율
+# (fp32 점수가 모두 clip 경계에 걸려 있으면 일치율은 의미가 없으므로 기준 1만 적용)
+MIN_MATCH_RATIO = 0.999
+SCORE_RANGE = (25, 100)
+
+
+def measure_throughput(model, features, repeat=THROUGHPUT_REPEAT):
+    """한 번의 배치 forward pass 기준 초당 처리 행 수"""
+    batch = np.tile(features, (repeat, 1))
+    run_model(model, batch[:64])  # 워밍업
+    start = time.perf_counter()
+    run_model(model, batch)
+    return len(batch) / (time.perf_counter() - start)
+
+
+def run_benchmark():
+    features = encode_features(load_predictions())
+    rows = []
+    for name, fp32_model in zip(["운동", "식단"], get_fp32_models()):
+        if fp32_model is None:
+            print(f"🚨 {name} 모델을 로드할 수 없어 건너뜁니다.")
+            continue
+        reference = run_model(fp32_model, features).reshape(-1)
+        reference_scores = np.clip(reference, *SCORE_RANGE).astype(np.int64)
+        # 모든 점수가 clip 경계 밖이면 정수 점수 비교로는 모드 간 차이를 볼 수 없음
+        scores_informative = bool(((reference > SCORE_RANGE[0]) & (reference < SCORE_RANGE[1])).any())
+        if not scores_informative:
+            print(f"⚠️ {name} 모델의 fp32 점수가 모두 {SCORE_RANGE} 경계에 걸려 있어 원시 출력 차이로만 판정합니다.")
+        scale = max(float(np.abs(reference).max()), np.finfo(np.float32).tiny)
+        for mode in INFERENCE_MODES:
+            model = apply_inference_mode(fp32_model, mode)
+            output = run_model(model, features).reshape(-1)
+            scores = np.clip(output, *SCORE_RANGE).astype(np.int64)
+            match_ratio = float((scores == reference_scores).mean())
+            max_drift = float(np.abs(output - reference).max())
+            relative_drift = max_drift / scale
+            passed = relative_drift <= MAX_RELATIVE_DRIFT and (not scores_informative or match_ratio >= MIN_MATCH_RATIO)
+            rows.append({
+                "모델": name,
+                "모드": mode,
+                "처리량(rows/s)": round(measure_throughput(model, features)),
+                "최대 점수 차이": max_drift,
+                "상대 차이": round(relative_drift, 6),
+                "정수 점수 일치율": match_ratio if scores_informative else np.nan,
+                "기준 충족": passed,
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    report = run_benchmark()
+    print("📊 추론 모드 벤치마크 (예측 히스토리 전체)")
+    print(report.to_string(index=False))
+    for name, group in report.groupby("모델"):
+        passing = group[group["기준 충족"]]
+        best = passing.loc[passing["처리량(rows/s)"].idxmax(), "모드"] if not passing.empty else "fp32"
+        print(f"✅ {name} 모델 권장 모드: {best}")
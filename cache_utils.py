@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    📌 여러 세션이 공유하는 스레드 안전 LRU 캐시.
+    max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 제거하며,
+    적중/미스 횟수를 집계합니다.
+    max_bytes를 지정하면 값(직렬화된 문자열/바이트)의 크기 합계도 이 한도 안으로 유지합니다.
+    문자열은 UTF-8로 인코딩한 바이트 수로 셉니다. (한글은 글자당 3바이트)
+    get/put에 version을 주면 데이터 버전(모델 파일 등)이 바뀌었을 때 같은 잠금 안에서 캐시를 비웁니다.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self.version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, version):
+        """(잠금 안에서 호출) 버전이 바뀌었으면 모든 항목을 비우고 새 버전을 기록"""
+        if version is not None and version != self.version:
+            self._data.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+            self.version = version
+
+    def get(self, key, default=None, version=None):
+        with self._lock:
+            self._sync_version(version)
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def _size(self, value):
+        if self.max_bytes is None:
+            return 0
+        return len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+
+    def put(self, key, value, version=None):
+        size = self._size(value)  # 인코딩은 잠금 밖에서
+        with self._lock:
+            if version is not None and version != self.version:
+                return  # 계산하는 동안 버전이 바뀜: 예전 버전의 값은 저장하지 않음
+            if key in self._data:
+                self.total_bytes -= self._sizes.pop(key)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._sizes[key] = size
+            self.total_bytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self._data) > 1):
+                evicted_key, _ = self._data.popitem(last=False)
+                self.total_bytes -= self._sizes.pop(evicted_key)
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+                self.total_bytes -= self._sizes.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """캐시 상태 (항목 수, 적중, 미스, 적중률)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
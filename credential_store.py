@@ -0,0 +1,149 @@
+import os
+import hmac
+import logging
+import hashlib
+import sqlite3
+import threading
+import user_store
+from user_data_utils import CREDENTIAL_KEYS, USER_STORE_BACKEND, read_user_mapping, write_user_mapping
+
+# 비밀번호 KDF 설정 (PBKDF2-HMAC-SHA256)
+PASSWORD_KDF = "pbkdf2_sha256"
+PASSWORD_KDF_ITERATIONS = int(os.getenv("PASSWORD_KDF_ITERATIONS", "200000"))
+PASSWORD_SALT_BYTES = 16
+# 기존 user_data.json의 솔트 없는 sha256 해시 (로그인 성공 시 PBKDF2로 교체)
+LEGACY_KDF = "sha256"
+
+# KDF는 호출한 세션의 스크립트 스레드에서 바로 계산 (hashlib은 계산 중 GIL을 놓으므로 다른 세션은 멈추지 않음)
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS credentials (
+    nickname    TEXT PRIMARY KEY,
+    hash        TEXT NOT NULL,
+    salt        TEXT NOT NULL,
+    kdf         TEXT NOT NULL,
+    iterations  INTEGER NOT NULL,
+    created_at  TEXT NOT NULL DEFAULT (datetime('now'))
+) WITHOUT ROWID;
+"""
+
+
+def _connection():
+    """📌 사용자 저장소와 같은 SQLite 파일의 연결 (credentials 테이블은 건강 정보와 분리)"""
+    conn = user_store.get_connection()
+    db_path = user_store.USER_DB_FILE
+    if db_path not in _initialized_paths:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                with conn:
+                    conn.executescript(_SCHEMA)
+                migrate_legacy_credentials(conn)
+                _initialized_paths.add(db_path)
+    return conn
+
+
+def migrate_legacy_credentials(conn):
+    """
+    📌 기존 사용자 레코드에 들어 있던 비밀번호 해시를 credentials 테이블로 한 번만 옮기고,
+    사용자 레코드(건강 정보)에서는 비밀번호 키를 지웁니다. 이미 있는 닉네임은 건드리지 않습니다.
+    옮긴 수를 반환합니다.
+    """
+    migrated = conn.execute("SELECT 1 FROM meta WHERE key = 'credentials_migrated'").fetchone()
+    removed = conn.execute("SELECT 1 FROM meta WHERE key = 'credential_keys_removed'").fetchone()
+    if migrated and removed:
+        return 0
+    if USER_STORE_BACKEND == "sqlite":
+        users = user_store.get_all_users()
+    else:
+        users = read_user_mapping() or {}
+    rows = [
+        (str(nickname), data["password"], "", LEGACY_KDF, 1)
+        for nickname, data in users.items()
+        if isinstance(data, dict) and data.get("password")
+    ]
+    if not migrated:
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO credentials (nickname, hash, salt, kdf, iterations) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('credentials_migrated', ?)", (str(len(rows)),))
+        logging.info(f"✅ 기존 사용자 비밀번호 {len(rows)}건을 credentials 테이블로 옮겼습니다.")
+    # 자격 증명은 credentials 테이블에만 보관 (사용자 레코드가 프로필/예측 로그로 복사되어도 새지 않도록)
+    _remove_credential_keys(users)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('credential_keys_removed', '1')")
+    return 0 if migrated else len(rows)
+
+
+def _remove_credential_keys(users):
+    stripped = {
+        nickname: {key: value for key, value in data.items() if key not in CREDENTIAL_KEYS}
+        for nickname, data in users.items()
+        if isinstance(data, dict) and CREDENTIAL_KEYS & data.keys()
+    }
+    if not stripped:
+        return
+    if USER_STORE_BACKEND == "sqlite":
+        user_store.upsert_users(stripped)
+    else:
+        write_user_mapping({**users, **stripped})
+    logging.info(f"✅ 사용자 레코드 {len(stripped)}건에서 비밀번호 키를 지웠습니다.")
+
+
+def derive_hash(password, salt, kdf=PASSWORD_KDF, iterations=PASSWORD_KDF_ITERATIONS):
+    """📌 저장된 KDF 설정으로 비밀번호 해시를 계산합니다."""
+    if kdf == LEGACY_KDF:
+        return hashlib.sha256(password.encode()).hexdigest()
+    if kdf == PASSWORD_KDF:
+        return hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations).hex()
+    raise ValueError(f"지원하지 않는 KDF: {kdf}")
+
+
+def _new_record(password):
+    salt = os.urandom(PASSWORD_SALT_BYTES).hex()
+    return derive_hash(password, salt), salt, PASSWORD_KDF, PASSWORD_KDF_ITERATIONS
+
+
+def nickname_exists(nickname):
+    """📌 닉네임이 이미 등록되어 있는지 확인합니다. (키 조회 한 번)"""
+    return _connection().execute("SELECT 1 FROM credentials WHERE nickname = ?", (nickname,)).fetchone() is not None
+
+
+def create_credential(nickname, password):
+    """
+    📌 새 사용자 자격 증명을 추가합니다. (행 하나 INSERT)
+    이미 있는 닉네임이면 False를 반환합니다.
+    """
+    record = _new_record(password)
+    try:
+        with _connection() as conn:
+            conn.execute(
+                "INSERT INTO credentials (nickname, hash, salt, kdf, iterations) VALUES (?, ?, ?, ?, ?)",
+                (nickname, *record),
+            )
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+
+def verify_password(nickname, password):
+    """📌 닉네임과 비밀번호가 맞으면 True"""
+    row = _connection().execute(
+        "SELECT hash, salt, kdf, iterations FROM credentials WHERE nickname = ?", (nickname,)
+    ).fetchone()
+    if row is None:
+        derive_hash(password, "00" * PASSWORD_SALT_BYTES)  # 없는 닉네임도 비슷한 시간이 걸리도록
+        return False
+    stored_hash, salt, kdf, iterations = row
+    if not hmac.compare_digest(derive_hash(password, salt, kdf, iterations), stored_hash):
+        return False
+    if kdf != PASSWORD_KDF or iterations != PASSWORD_KDF_ITERATIONS:
+        # ✅ 예전 방식의 해시는 로그인 성공 시 현재 KDF 설정으로 교체
+        with _connection() as conn:
+            conn.execute(
+                "UPDATE credentials SET hash = ?, salt = ?, kdf = ?, iterations = ? WHERE nickname = ?",
+                (*_new_record(password), nickname),
+            )
+    return True
@@ -0,0 +1,165 @@
+"""
+🏃 운동 MET 카탈로그
+
+data/exercise_data_2.csv(운동명, 단위체중당에너지소비량, user_id)를 한 번만 읽어
+운동명을 정수 id로 사전 인코딩하고, 운동별 MET 통계를 NumPy 배열로 보관합니다.
+결과는 바이너리 스냅샷(data/exercise_catalog/)으로 저장되어 다음 실행부터는 CSV 대신 메모리 매핑으로 엽니다.
+
+실행: python exercise_catalog.py (스냅샷을 다시 만들고 요약을 출력합니다)
+"""
+import os
+import json
+import logging
+import threading
+import numpy as np
+import pandas as pd
+
+EXERCISE_DATA_FILE = os.getenv("EXERCISE_DATA_FILE", "data/exercise_data_2.csv")
+EXERCISE_CATALOG_DIR = os.getenv("EXERCISE_CATALOG_DIR", "data/exercise_catalog")
+NAMES_FILE = "names.json"
+STATS_FILE = "stats.npy"
+
+NAME_COLUMN = "운동명"
+MET_COLUMN = "단위체중당에너지소비량"  # kcal / kg / 시간 (= MET)
+# stats 배열의 열 순서
+STAT_COLUMNS = ["count", "mean", "std", "min", "max"]
+MEAN = STAT_COLUMNS.index("mean")
+UNKNOWN_ID = -1
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def compute_stats(codes, values, n_exercises):
+    """📌 운동 id(codes)별 MET 통계 (n_exercises, 5) float64 배열 — count, mean, std, min, max"""
+    counts = np.bincount(codes, minlength=n_exercises).astype(np.float64)
+    sums = np.bincount(codes, weights=values, minlength=n_exercises)
+    sumsq = np.bincount(codes, weights=values * values, minlength=n_exercises)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        stds = np.sqrt(np.maximum(sumsq / counts - means * means, 0.0))
+    mins = np.full(n_exercises, np.inf)
+    maxs = np.full(n_exercises, -np.inf)
+    np.minimum.at(mins, codes, values)
+    np.maximum.at(maxs, codes, values)
+    return np.column_stack([counts, means, stds, mins, maxs])
+
+
+class ExerciseCatalog:
+    """
+    📌 운동명 ↔ 정수 id 사전과 운동별 MET 통계 배열.
+    names[i]가 id i의 운동명이며, stats[i]는 STAT_COLUMNS 순서의 통계입니다.
+    """
+
+    def __init__(self, names, stats):
+        self.names = list(names)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        self.stats = stats
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def build(cls, source=EXERCISE_DATA_FILE):
+        """CSV에서 카탈로그를 만듭니다. (운동명은 가나다 순으로 id 부여)"""
+        df = pd.read_csv(source, usecols=[NAME_COLUMN, MET_COLUMN])
+        df = df.dropna()
+        codes, names = pd.factorize(df[NAME_COLUMN].str.strip(), sort=True)
+        values = df[MET_COLUMN].to_numpy(dtype=np.float64)
+        return cls(names.tolist(), compute_stats(codes, values, len(names)))
+
+    def save(self, directory, source_signature):
+        """📌 바이너리 스냅샷 저장 (통계 배열은 .npy, 이름 사전은 JSON — JSON을 마지막에 써서 완료 표시)"""
+        os.makedirs(directory, exist_ok=True)
+        stats_path = os.path.join(directory, STATS_FILE)
+        with open(f"{stats_path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self.stats, dtype=np.float64))
+        os.replace(f"{stats_path}.tmp", stats_path)
+        names_path = os.path.join(directory, NAMES_FILE)
+        with open(f"{names_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"source": source_signature, "stat_columns": STAT_COLUMNS, "names": self.names}, f, ensure_ascii=False)
+        os.replace(f"{names_path}.tmp", names_path)
+
+    @classmethod
+    def open_snapshot(cls, directory, source_signature=None):
+        """📌 스냅샷을 메모리 매핑으로 엽니다. 없거나 원본 CSV가 바뀌었으면 None"""
+        try:
+            with open(os.path.join(directory, NAMES_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            stats = np.load(os.path.join(directory, STATS_FILE), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        if source_signature is not None and meta.get("source") != source_signature:
+            return None
+        if meta.get("stat_columns") != STAT_COLUMNS or stats.shape != (len(meta["names"]), len(STAT_COLUMNS)):
+            return None
+        return cls(meta["names"], stats)
+
+    def lookup(self, exercises):
+        """📌 운동명(또는 id) 목록 → id 배열 (모르는 운동명과 범위 [0, len) 밖의 id는 UNKNOWN_ID)"""
+        ids = np.fromiter(
+            (exercise if isinstance(exercise, (int, np.integer)) else self.ids.get(str(exercise).strip(), UNKNOWN_ID)
+             for exercise in exercises),
+            dtype=np.int64,
+        )
+        ids[(ids < 0) | (ids >= len(self.names))] = UNKNOWN_ID
+        return ids
+
+    def met(self, exercises):
+        """📌 운동별 평균 MET 배열 (모르는 운동은 NaN)"""
+        ids = self.lookup(exercises)
+        mets = np.full(len(ids), np.nan)
+        known = ids != UNKNOWN_ID
+        mets[known] = self.stats[ids[known], MEAN]
+        return mets
+
+    def kcal(self, exercises, weights, minutes):
+        """
+        📌 (운동, 체중 kg, 운동 시간 분) 목록의 소모 칼로리를 한 번에 계산합니다.
+        kcal = MET × 체중(kg) × 시간(h). weights/minutes는 스칼라 또는 exercises와 같은 길이의 배열.
+        모르는 운동은 NaN을 반환합니다.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        minutes = np.asarray(minutes, dtype=np.float64)
+        return self.met(exercises) * weights * (minutes / 60.0)
+
+
+def load_exercise_catalog(source=EXERCISE_DATA_FILE, directory=EXERCISE_CATALOG_DIR):
+    """📌 스냅샷이 최신이면 메모리 매핑으로 열고, 아니면 CSV로 만들어 스냅샷을 저장합니다."""
+    signature = _source_signature(source)
+    catalog = ExerciseCatalog.open_snapshot(directory, signature)
+    if catalog is None:
+        catalog = ExerciseCatalog.build(source)
+        try:
+            catalog.save(directory, signature)
+            catalog = ExerciseCatalog.open_snapshot(directory, signature) or catalog
+        except OSError as e:
+            logging.error(f"🚨 운동 카탈로그 스냅샷 저장 실패: {e}")
+        logging.info(f"✅ 운동 카탈로그 생성: {len(catalog)}종목 ({source})")
+    return catalog
+
+
+def get_exercise_catalog():
+    """📌 프로세스 공용 운동 카탈로그 (최초 호출 시 로드)"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = load_exercise_catalog()
+    return _catalog
+
+
+if __name__ == "__main__":
+    catalog = ExerciseCatalog.build()
+    catalog.save(EXERCISE_CATALOG_DIR, _source_signature(EXERCISE_DATA_FILE))
+    catalog = load_exercise_catalog()
+    print(f"✅ 운동 카탈로그 스냅샷: {len(catalog)}종목 → {EXERCISE_CATALOG_DIR}")
+    summary = pd.DataFrame(np.asarray(catalog.stats), columns=STAT_COLUMNS, index=catalog.names)
+    print(summary.sort_values("mean", ascending=False).head(10).to_string())
+    sample = ["걷기", "골프", "스키"]
+    print("70kg, 30분 기준 kcal:", dict(zip(sample, catalog.kcal(sample, 70, 30).round(1).tolist())))
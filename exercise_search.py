@@ -0,0 +1,189 @@
+"""
+🔎 오타를 허용하는 운동명 검색
+
+운동 카탈로그(exercise_catalog)의 운동명을 한글 자모 단위로 분해해
+- 접두사 트라이 (입력 중인 글자까지 포함한 자동완성)
+- 자모 bigram 역색인 (후보 추리기)
+- 비트 병렬(Myers) 근사 문자열 매칭 (후보 안에서 가장 가까운 부분 문자열과의 자모 편집 거리)
+으로 상위 k개 제안을 찾습니다. 색인은 프로세스에서 한 번만 만듭니다.
+"""
+import re
+import threading
+from collections import defaultdict
+from exercise_catalog import STAT_COLUMNS, get_exercise_catalog
+
+# 한글 음절 → 초성/중성/종성 (호환 자모)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ["", *"ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"]
+HANGUL_BASE, HANGUL_LAST = 0xAC00, 0xD7A3
+
+# 검색 설정
+SEARCH_TOP_K = 5
+CANDIDATE_LIMIT = 24  # bigram 겹침 상위 후보 수 (편집 거리 계산 대상)
+MIN_SIMILARITY = 0.6  # 이보다 낮은 제안은 버림
+RESOLVE_SIMILARITY = 0.85  # 입력을 운동 id로 확정할 최소 유사도
+
+_SPACES = re.compile(r"\s+")
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def decompose(text):
+    """📌 한글 음절을 자모로 분해합니다. (공백 제거, 영문은 소문자)"""
+    jamo = []
+    for ch in _SPACES.sub("", text).lower():
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            offset = code - HANGUL_BASE
+            jamo.append(CHOSEONG[offset // 588])
+            jamo.append(JUNGSEONG[(offset % 588) // 28])
+            jamo.append(JONGSEONG[offset % 28])
+        else:
+            jamo.append(ch)
+    return "".join(jamo)
+
+
+def bigrams(jamo):
+    return {jamo[i:i + 2] for i in range(len(jamo) - 1)} or {jamo}
+
+
+def _pattern_masks(pattern):
+    masks = defaultdict(int)
+    for i, ch in enumerate(pattern):
+        masks[ch] |= 1 << i
+    return masks
+
+
+def jamo_distance(masks, m, text, substring=True):
+    """
+    📌 패턴(길이 m, 자모별 비트 마스크)과 text 사이의 자모 편집 거리.
+    substring=True면 text 안에서 가장 가까운 부분 문자열과의 거리, False면 text 전체와의 거리.
+    Myers 비트 병렬 알고리즘으로 text 글자당 정수 연산 몇 번이면 됩니다.
+    """
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    carry = 0 if substring else 1  # 부분 문자열 검색: text 앞부분 건너뛰기는 비용 없음
+    pv, mv, score = full, 0, m
+    best = m
+    for ch in text:
+        eq = masks.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | carry) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+        if substring and score < best:
+            best = score
+            if best == 0:
+                break
+    return best if substring else score
+
+
+class ExerciseSearchIndex:
+    """📌 운동명 자동완성 색인 (접두사 트라이 + 자모 bigram + 자모 편집 거리)"""
+
+    def __init__(self, names, popularity=None):
+        self.names = list(names)
+        self.popularity = list(popularity) if popularity is not None else [0] * len(self.names)
+        self.jamo = [decompose(name) for name in self.names]
+        self.exact = {}
+        self.trie = {}
+        self.postings = defaultdict(list)
+        for exercise_id, jamo in enumerate(self.jamo):
+            self.exact.setdefault(jamo, exercise_id)
+            node = self.trie
+            for ch in jamo:
+                node = node.setdefault(ch, {})
+                node.setdefault("#", []).append(exercise_id)  # 이 접두사를 가진 운동 id
+            for gram in bigrams(jamo):
+                self.postings[gram].append(exercise_id)
+        # 같은 접두사 안에서는 기록이 많은 운동, 짧은 이름 순으로 제안
+        self._rank = {i: (-self.popularity[i], len(self.jamo[i])) for i in range(len(self.names))}
+        self._sort_trie(self.trie)
+
+    def _sort_trie(self, node):
+        for key, child in node.items():
+            if key == "#":
+                child.sort(key=self._rank.__getitem__)
+            else:
+                self._sort_trie(child)
+
+    def _prefix_ids(self, jamo):
+        node = self.trie
+        for ch in jamo:
+            node = node.get(ch)
+            if node is None:
+                return []
+        return node.get("#", [])
+
+    def search(self, query, k=SEARCH_TOP_K):
+        """
+        📌 입력 문자열과 가까운 운동 상위 k개를 [(운동 id, 운동명, 유사도 0~1), ...]로 반환합니다.
+        유사도 = 1 - (가장 가까운 부분 문자열과의 자모 편집 거리 / 입력 자모 수)
+        """
+        jamo = decompose(query)
+        if not jamo:
+            return []
+        prefix_ids = self._prefix_ids(jamo)[:k]
+        results = {exercise_id: 1.0 for exercise_id in prefix_ids}
+        if len(results) < k:
+            overlap = defaultdict(int)
+            for gram in bigrams(jamo):
+                for exercise_id in self.postings.get(gram, ()):
+                    overlap[exercise_id] += 1
+            candidates = sorted(overlap, key=lambda i: (-overlap[i], self._rank[i]))[:CANDIDATE_LIMIT]
+            masks, m = _pattern_masks(jamo), len(jamo)
+            for exercise_id in candidates:
+                if exercise_id in results:
+                    continue
+                similarity = 1 - jamo_distance(masks, m, self.jamo[exercise_id]) / m
+                if similarity >= MIN_SIMILARITY:
+                    results[exercise_id] = similarity
+        # 같은 유사도면 이름 전체 일치 → 접두사 일치 → 기록 수 순
+        prefixes = set(prefix_ids)
+        ranked = sorted(
+            results,
+            key=lambda i: (-results[i], self.jamo[i] != jamo, i not in prefixes, self._rank[i]),
+        )[:k]
+        return [(exercise_id, self.names[exercise_id], round(results[exercise_id], 3)) for exercise_id in ranked]
+
+    def resolve(self, query, min_similarity=RESOLVE_SIMILARITY):
+        """
+        📌 입력을 운동 id로 확정합니다. 없으면 None.
+        제안 중 운동명 전체와의 자모 유사도가 min_similarity 이상인 것만 인정합니다.
+        (오타는 바로잡되, '무릎'처럼 운동명 일부일 뿐인 입력은 운동으로 보지 않음)
+        """
+        jamo = decompose(query)
+        if jamo in self.exact:
+            return self.exact[jamo]
+        if not jamo:
+            return None
+        masks, m = _pattern_masks(jamo), len(jamo)
+        best_id, best_similarity = None, min_similarity
+        for exercise_id, _, _ in self.search(query):
+            name = self.jamo[exercise_id]
+            similarity = 1 - jamo_distance(masks, m, name, substring=False) / max(m, len(name))
+            if similarity >= best_similarity:
+                best_id, best_similarity = exercise_id, similarity
+        return best_id
+
+
+def get_exercise_search_index():
+    """📌 운동 카탈로그로 만든 프로세스 공용 검색 색인 (최초 호출 시 한 번 생성)"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                catalog = get_exercise_catalog()
+                counts = catalog.stats[:, STAT_COLUMNS.index("count")]
+                _index = ExerciseSearchIndex(catalog.names, popularity=counts.tolist())
+    return _index
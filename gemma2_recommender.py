@@ -6,6 +6,7 @@ import streamlit as st
 import logging
 from typing import List, Dict, Set, Tuple
 import pandas as pd
+from user_data_utils import UserProfile
 
 
 # Hugging Face API 토큰 가져오기
@@ -64,7 +65,8 @@ def generate_text_via_api(
 
 
 def get_user_info_with_default(user_data: Dict[str, str]) -> Dict[str, str]:
-    """사용자 정보 중 '미측정' 항목은 기본값으로 채워 반환합니다."""
+    """사용자 정보 중 '미측정' 항목은 기본값으로 채워 반환합니다. (예전 키 이름도 정규 키로 맞춤)"""
+    user_data = UserProfile.from_dict(user_data).to_dict()
     default_info = {
         "BMI": "23",
         "허리둘레": "80cm",
@@ -154,6 +156,8 @@ def get_gemma_recommendation(
                 prompt += f"- 사용자의 체력 수준은 {info_value[0]}입니다.\n"
             elif info_type == "선호 운동":
                 prompt += f"- 선호하는 운동 유형: {', '.join(info_value)}\n"
+            elif info_type == "선호 운동 종목" and info_value:
+                prompt += f"- 좋아하는 운동 종목: {', '.join(info_value)}\n"
             elif info_type == "운동 제한":
                 prompt += f"- 다음 운동은 제외하고 대체 운동을 제안하세요: {', '.join(info_value)}\n"
 
@@ -0,0 +1,199 @@
+import os
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+import pandas as pd
+import user_store
+from user_data_utils import UserProfile
+from prediction_log import read_predictions
+
+# 사용자별 건강 기록 (user_id, 기록 시각) 시계열 — 사용자 저장소와 같은 SQLite 파일 사용
+# 한 페이지에 그릴 최대 점 수: 기록이 이보다 많으면 일별/주별로 묶어서 조회
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "365"))
+
+# 기록 종류
+KIND_PROFILE = "profile"  # 건강 정보 저장
+KIND_PREDICTION = "prediction"  # 예측 실행
+
+# 저장할 지표: (컬럼 이름, 프로필 키)
+HISTORY_METRICS = [
+    ("weight", "현재 체중"),
+    ("bmi", "BMI"),
+    ("systolic_bp", "수축기혈압(최고 혈압)"),
+    ("diastolic_bp", "이완기혈압(최저 혈압)"),
+    ("total_cholesterol", "총콜레스테롤"),
+    ("exercise_score", "운동 점수"),
+    ("diet_score", "식단 점수"),
+]
+METRIC_COLUMNS = [column for column, _ in HISTORY_METRICS]
+
+# 조회 단위 → 묶음 기준 (SQLite 날짜 함수)
+ROLLUPS = {
+    "raw": None,
+    "daily": "date(recorded_at)",
+    "weekly": "date(recorded_at, 'weekday 0', '-6 days')",  # 해당 주 월요일
+}
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+# 기본 키 (user_id, recorded_at, kind)가 곧 인덱스: 한 사용자의 기간 조회는 범위 스캔 한 번
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS health_history (
+    user_id     TEXT NOT NULL,
+    recorded_at TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    {", ".join(f"{column} REAL" for column in METRIC_COLUMNS)},
+    PRIMARY KEY (user_id, recorded_at, kind)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS prediction_runs (
+    run_id     TEXT PRIMARY KEY,
+    user_id    TEXT NOT NULL,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _connection():
+    conn = user_store.get_connection()
+    db_path = user_store.USER_DB_FILE
+    if db_path not in _initialized_paths:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                with conn:
+                    conn.executescript(_SCHEMA)
+                backfill_from_predictions(conn)
+                _initialized_paths.add(db_path)
+    return conn
+
+
+def _row(user_id, recorded_at, kind, record):
+    profile = UserProfile.from_dict(record)
+    values = []
+    for _, key in HISTORY_METRICS:
+        try:
+            values.append(float(profile.get(key)) if profile.get(key) is not None else None)
+        except (TypeError, ValueError):
+            values.append(None)
+    return (str(user_id), recorded_at, kind, *values)
+
+
+def _insert(conn, rows):
+    placeholders = ", ".join("?" * (3 + len(METRIC_COLUMNS)))
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO health_history (user_id, recorded_at, kind, {', '.join(METRIC_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+
+
+def backfill_from_predictions(conn):
+    """
+    📌 기존 예측 히스토리(predictions.csv + 예측 로그)를 한 번만 건강 기록으로 옮깁니다.
+    옮긴 행 수를 반환합니다.
+    """
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'history_backfilled'").fetchone():
+        return 0
+    df = read_predictions()
+    rows = []
+    if not df.empty and {"user_id", "예측 날짜"} <= set(df.columns):
+        timestamps = pd.to_datetime(df["예측 날짜"], errors="coerce")
+        for record, timestamp in zip(df.to_dict("records"), timestamps):
+            if pd.isna(timestamp) or pd.isna(record.get("user_id")):
+                continue
+            rows.append(_row(record["user_id"], timestamp.strftime(TIMESTAMP_FORMAT), KIND_PREDICTION, record))
+    _insert(conn, rows)
+    with conn:
+        conn.execute("INSERT INTO meta (key, value) VALUES ('history_backfilled', ?)", (str(len(rows)),))
+    logging.info(f"✅ 예측 히스토리 {len(rows)}건을 건강 기록으로 옮겼습니다.")
+    return len(rows)
+
+
+def record_health_entry(user_id, record, kind=KIND_PROFILE, recorded_at=None):
+    """📌 저장된 프로필 또는 예측 결과 한 건을 사용자 건강 기록에 추가합니다. (실패해도 저장 흐름은 계속)"""
+    recorded_at = (recorded_at or datetime.now()).strftime(TIMESTAMP_FORMAT)
+    try:
+        _insert(_connection(), [_row(user_id, recorded_at, kind, record)])
+    except sqlite3.Error as e:
+        logging.error(f"🚨 건강 기록 저장 중 오류 발생: {e}")
+
+
+def claim_prediction_run(run_id, user_id):
+    """
+    📌 예측 실행 ID를 저장소에 기록합니다. 처음 보는 ID면 True, 이미 처리된 ID면 False.
+    재시작 후에도 같은 실행이 예측 로그에 두 번 저장되지 않도록 합니다. (저장소 오류 시에는 True로 진행)
+    """
+    try:
+        conn = _connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO prediction_runs (run_id, user_id, created_at) VALUES (?, ?, ?)",
+                (run_id, str(user_id), datetime.now().strftime(TIMESTAMP_FORMAT)),
+            )
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logging.error(f"🚨 예측 실행 ID 기록 중 오류 발생: {e}")
+        return True
+
+
+def release_prediction_run(run_id):
+    """📌 저장에 실패한 예측 실행 ID를 지워 다시 실행할 수 있게 합니다."""
+    try:
+        conn = _connection()
+        with conn:
+            conn.execute("DELETE FROM prediction_runs WHERE run_id = ?", (run_id,))
+    except sqlite3.Error as e:
+        logging.error(f"🚨 예측 실행 ID 삭제 중 오류 발생: {e}")
+
+
+def count_history(user_id):
+    """📌 사용자의 기록 수 (인덱스만 사용)"""
+    return _connection().execute("SELECT COUNT(*) FROM health_history WHERE user_id = ?", (str(user_id),)).fetchone()[0]
+
+
+def choose_rollup(user_id, max_points=HISTORY_MAX_POINTS):
+    """📌 기록 수가 max_points 이하가 되는 가장 세밀한 조회 단위"""
+    conn = _connection()
+    for rollup, bucket in ROLLUPS.items():
+        expression = bucket or "recorded_at"
+        points = conn.execute(
+            f"SELECT COUNT(DISTINCT {expression}) FROM health_history WHERE user_id = ?", (str(user_id),)
+        ).fetchone()[0]
+        if points <= max_points:
+            return rollup
+    return "weekly"
+
+
+def load_history(user_id, rollup="raw", start=None, end=None):
+    """
+    📌 한 사용자의 건강 기록을 시간순 DataFrame으로 반환합니다.
+    rollup: "raw"(기록 그대로), "daily", "weekly" — 묶음 단위별 평균은 SQLite에서 계산합니다.
+    start/end: 조회 기간 (datetime 또는 "YYYY-MM-DD" 문자열, 생략 가능)
+    반환 컬럼: date, kind(raw일 때), weight, bmi, systolic_bp, diastolic_bp, total_cholesterol, exercise_score, diet_score
+    """
+    if rollup not in ROLLUPS:
+        raise ValueError(f"지원하지 않는 조회 단위: {rollup}")
+    conditions, params = ["user_id = ?"], [str(user_id)]
+    if start is not None:
+        conditions.append("recorded_at >= ?")
+        params.append(str(start))
+    if end is not None:
+        conditions.append("recorded_at < ?")
+        params.append(str(end))
+    where = " AND ".join(conditions)
+
+    bucket = ROLLUPS[rollup]
+    if bucket is None:
+        query = (f"SELECT recorded_at AS date, kind, {', '.join(METRIC_COLUMNS)} FROM health_history "
+                 f"WHERE {where} ORDER BY recorded_at")
+    else:
+        averages = ", ".join(f"AVG({column}) AS {column}" for column in METRIC_COLUMNS)
+        query = (f"SELECT {bucket} AS date, {averages} FROM health_history "
+                 f"WHERE {where} GROUP BY {bucket} ORDER BY date")
+    df = pd.read_sql_query(query, _connection(), params=params)
+    df["date"] = pd.to_datetime(df["date"], format="mixed")
+    return df
@@ -0,0 +1,320 @@
+import os
+import json
+import math
+import bisect
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+# 규칙 테이블을 코드 수정 없이 바꾸고 싶을 때 사용할 JSON 파일 경로 (선택)
+HEALTH_RULES_FILE = os.getenv("HEALTH_RULES_FILE", "")
+
+# ✅ 건강 정보 점수 규칙 테이블
+# - bands: edges 기준 구간별 점수 (x < edges[0] → scores[0], edges[i-1] <= x < edges[i] → scores[i], ...)
+# - categories: 값별 점수, 매핑에 없으면 default_score
+# - conditions: 위에서부터 처음 만족하는 case의 점수, 모두 아니면 default_score
+#   조건: [컬럼, "between", low, high, inclusive] (inclusive: both/left/right/neither) 또는 [컬럼, "eq", 값]
+# - default: 값이 없을 때 사용할 기본값
+HEALTH_RULES = [
+    {
+        "name": "BMI", "type": "bands", "column": "BMI", "default": 0,
+        "edges": [18.5, 23, 25, 30], "scores": [4, 10, 8, 6, 4],
+    },
+    {
+        # 허리둘레 점수 계산 (성별에 따라 다른 기준 적용)
+        "name": "허리둘레", "type": "bands", "column": "허리둘레", "default": 0,
+        "group_by": "성별", "group_default": "남성",
+        "groups": {"남성": {"edges": [90, 100], "scores": [10, 7, 4]}},
+        "otherwise": {"edges": [85, 95], "scores": [10, 7, 4]},  # 여성
+    },
+    {
+        "name": "혈압", "type": "conditions",
+        "defaults": {"수축기혈압(최고 혈압)": 0, "이완기혈압(최저 혈압)": 0},
+        "cases": [
+            {"all": [["수축기혈압(최고 혈압)", "between", 90, 120, "both"],
+                     ["이완기혈압(최저 혈압)", "between", 60, 80, "both"]], "score": 10},
+            {"any": [["수축기혈압(최고 혈압)", "between", 120, 140, "right"],
+                     ["이완기혈압(최저 혈압)", "between", 80, 90, "right"]], "score": 7},
+        ],
+        "default_score": 4,
+    },
+    {
+        "name": "총 콜레스테롤", "type": "bands", "column": "총콜레스테롤", "default": 0,
+        "edges": [200, 240], "scores": [10, 7, 4],
+    },
+    {
+        "name": "고혈당 위험", "type": "categories", "column": "고혈당 위험", "default": "낮음",
+        "mapping": {"낮음": 10, "보통": 7}, "default_score": 4,
+    },
+    {
+        "name": "간 지표", "type": "categories", "column": "간 지표", "default": "정상",
+        "mapping": {"정상": 10, "경계": 7}, "default_score": 4,
+    },
+    {
+        "name": "흡연/음주", "type": "conditions",
+        "defaults": {"흡연상태": "비흡연", "음주여부": "비음주"},
+        "cases": [
+            {"all": [["흡연상태", "eq", "비흡연"], ["음주여부", "eq", "비음주"]], "score": 10},
+            {"any": [["흡연상태", "eq", "비흡연"], ["음주여부", "eq", "비음주"]], "score": 7},
+        ],
+        "default_score": 4,
+    },
+    {
+        "name": "연령", "type": "bands", "column": "나이", "default": 30,
+        "edges": [40, 60], "scores": [10, 8, 6],
+    },
+]
+
+# ✅ 추천 메시지 점수 구간 (final_score > threshold 를 만족하는 가장 높은 구간의 메시지)
+RECOMMENDATION_BANDS = {
+    "운동": {
+        "thresholds": [20, 30, 40, 50, 60, 70, 80, 90],
+        "messages": [
+            "❗❗❗ 건강에 적신호입니다! 즉시 전문가와 상담하세요.",
+            "❗❗ 운동이 매우 부족합니다. 가능한 한 매일 몸을 움직이세요.",
+            "❗ 규칙적인 운동 계획이 필요합니다. 매일 조금씩 시작해 보세요.",
+            "⚠️ 운동 부족입니다. 가벼운 스트레칭부터 시작하세요.",
+            "⚠️ 운동량을 늘려보세요. 하루 30분 정도의 걷기부터 시작해 보세요.",
+            "🥉 꾸준한 운동을 하고 계시네요! 유산소와 근력 운동을 균형 있게 조합해 보세요.",
+            "🥈 좋은 운동 습관입니다! 다양한 운동을 시도해 보세요.",
+            "🥇 훌륭한 운동 습관입니다. 조금 더 강도 있는 운동을 고려해 보세요.",
+            "🏆 최고의 운동 습관! 꾸준한 운동이 건강을 지키는 열쇠입니다.",
+        ],
+    },
+    "식단": {
+        "thresholds": [20, 30, 40, 50, 60, 70, 80, 90],
+        "messages": [
+            "❗❗❗ 건강에 위험 신호가 감지됩니다. 즉시 전문가와 상담하세요.",
+            "❗❗ 식단이 매우 불균형합니다. 전문가의 상담이 필요합니다.",
+            "❗ 식단 개선이 필요합니다. 매 끼니에 영양소를 골고루 포함시키세요!",
+            "⚠️ 건강한 식습관을 위해 더 많은 신선한 재료를 섭취해 보세요.",
+            "⚠️ 식단 개선이 필요합니다. 탄수화물과 단백질의 균형을 맞춰 보세요.",
+            "🥉 괜찮은 식단입니다. 가공식품을 줄이고 자연식 위주로 개선해 보세요.",
+            "🥈 좋은 식습관입니다. 신선한 채소와 과일을 더 늘려 보세요.",
+            "🥇 매우 건강한 식습관입니다. 식단을 계속 유지하세요!",
+            "🏆 완벽한 식단 관리! 균형 잡힌 영양 섭취를 유지하세요.",
+        ],
+    },
+}
+UNKNOWN_RECOMMENDATION = "🚨 알 수 없는 추천 유형입니다."
+
+
+def load_rules(path=HEALTH_RULES_FILE):
+    """
+    📌 규칙 테이블을 반환합니다.
+    path에 JSON 파일이 있으면 {"health_rules": [...], "recommendation_bands": {...}}로 기본값을 덮어씁니다.
+    """
+    rules, bands = HEALTH_RULES, RECOMMENDATION_BANDS
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+            rules = overrides.get("health_rules", rules)
+            bands = overrides.get("recommendation_bands", bands)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.error(f"🚨 규칙 파일({path})을 읽을 수 없어 기본 규칙을 사용합니다: {e}")
+    return rules, bands
+
+
+def _column(df, name, default):
+    """컬럼이 없거나 값이 비어 있으면 default로 채운 Series"""
+    if name not in df.columns:
+        return pd.Series(default, index=df.index)
+    return df[name].where(df[name].notna(), default)
+
+
+def _numeric(series):
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _between(values, low, high, inclusive):
+    lower = values >= low if inclusive in ("both", "left") else values > low
+    upper = values <= high if inclusive in ("both", "right") else values < high
+    return lower & upper
+
+
+def _compile_bands(rule):
+    def band_scores(band, values):
+        # side="right": edges[i-1] <= x < edges[i] 구간 (NaN은 마지막 구간)
+        return np.asarray(band["scores"])[np.searchsorted(band["edges"], values, side="right")]
+
+    def kernel(df):
+        values = _numeric(_column(df, rule["column"], rule["default"]))
+        if "group_by" not in rule:
+            return band_scores(rule, values)
+        groups = _column(df, rule["group_by"], rule["group_default"]).to_numpy()
+        result = band_scores(rule["otherwise"], values)
+        for group, band in rule["groups"].items():
+            mask = groups == group
+            result[mask] = band_scores(band, values[mask])
+        return result
+    return kernel
+
+
+def _compile_categories(rule):
+    def kernel(df):
+        values = _column(df, rule["column"], rule["default"])
+        return values.map(rule["mapping"]).fillna(rule["default_score"]).to_numpy(dtype=np.int64)
+    return kernel
+
+
+def _compile_conditions(rule):
+    defaults = rule.get("defaults", {})
+
+    def atom(df, condition):
+        column, op = condition[0], condition[1]
+        series = _column(df, column, defaults.get(column, 0))
+        if op == "eq":
+            return (series == condition[2]).to_numpy()
+        if op == "between":
+            return _between(_numeric(series), condition[2], condition[3], condition[4])
+        raise ValueError(f"알 수 없는 조건 연산자: {op}")
+
+    def kernel(df):
+        masks = []
+        for case in rule["cases"]:
+            if "all" in case:
+                masks.append(np.logical_and.reduce([atom(df, c) for c in case["all"]]))
+            else:
+                masks.append(np.logical_or.reduce([atom(df, c) for c in case["any"]]))
+        return np.select(masks, [case["score"] for case in rule["cases"]], default=rule["default_score"])
+    return kernel
+
+
+_COMPILERS = {"bands": _compile_bands, "categories": _compile_categories, "conditions": _compile_conditions}
+
+
+# ✅ 한 사용자(딕셔너리 또는 UserProfile)용 스칼라 커널: DataFrame 없이 같은 규칙을 평가
+def _value(profile, name, default):
+    """_column과 같은 의미: 키가 없거나 비어 있으면 default"""
+    value = profile.get(name)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return default
+    return value
+
+
+def _scalar_numeric(value):
+    """_numeric과 같은 의미: 숫자로 바꿀 수 없으면 NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _scalar_between(value, low, high, inclusive):
+    lower = value >= low if inclusive in ("both", "left") else value > low
+    upper = value <= high if inclusive in ("both", "right") else value < high
+    return lower and upper
+
+
+def _scalar_bands(rule):
+    def band_score(band, value):
+        # bisect_right = searchsorted(side="right"), NaN은 어떤 경계보다도 작지 않으므로 마지막 구간
+        return band["scores"][bisect.bisect_right(band["edges"], value)]
+
+    def kernel(profile):
+        value = _scalar_numeric(_value(profile, rule["column"], rule["default"]))
+        if "group_by" not in rule:
+            return band_score(rule, value)
+        group = _value(profile, rule["group_by"], rule["group_default"])
+        return band_score(rule["groups"].get(group, rule["otherwise"]), value)
+    return kernel
+
+
+def _scalar_categories(rule):
+    def kernel(profile):
+        return rule["mapping"].get(_value(profile, rule["column"], rule["default"]), rule["default_score"])
+    return kernel
+
+
+def _scalar_conditions(rule):
+    defaults = rule.get("defaults", {})
+
+    def atom(profile, condition):
+        column, op = condition[0], condition[1]
+        value = _value(profile, column, defaults.get(column, 0))
+        if op == "eq":
+            return value == condition[2]
+        if op == "between":
+            return _scalar_between(_scalar_numeric(value), condition[2], condition[3], condition[4])
+        raise ValueError(f"알 수 없는 조건 연산자: {op}")
+
+    def kernel(profile):
+        for case in rule["cases"]:
+            if "all" in case:
+                matched = all(atom(profile, c) for c in case["all"])
+            else:
+                matched = any(atom(profile, c) for c in case["any"])
+            if matched:
+                return case["score"]
+        return rule["default_score"]
+    return kernel
+
+
+_SCALAR_COMPILERS = {"bands": _scalar_bands, "categories": _scalar_categories, "conditions": _scalar_conditions}
+
+
+def compile_rules(rules):
+    """📌 규칙 테이블을 [(규칙 이름, DataFrame → 점수 배열 커널), ...]로 컴파일합니다."""
+    return [(rule["name"], _COMPILERS[rule["type"]](rule)) for rule in rules]
+
+
+def compile_scalar_rules(rules):
+    """📌 규칙 테이블을 [(규칙 이름, 프로필 한 건 → 점수 커널), ...]로 컴파일합니다."""
+    return [(rule["name"], _SCALAR_COMPILERS[rule["type"]](rule)) for rule in rules]
+
+
+def rule_columns(rules):
+    """규칙이 읽는 입력 컬럼 목록 (순서 유지, 중복 제거)"""
+    columns = []
+    for rule in rules:
+        names = [rule.get("column"), rule.get("group_by")] + list(rule.get("defaults", {}))
+        columns.extend(name for name in names if name and name not in columns)
+    return columns
+
+
+ACTIVE_RULES, ACTIVE_BANDS = load_rules()
+COMPILED_RULES = compile_rules(ACTIVE_RULES)
+SCALAR_RULES = compile_scalar_rules(ACTIVE_RULES)
+RULE_COLUMNS = rule_columns(ACTIVE_RULES)
+# 규칙이 바뀌면 달라지는 버전 태그 (점수 캐시 키에 사용)
+RULES_VERSION = hashlib.blake2b(
+    json.dumps([ACTIVE_RULES, ACTIVE_BANDS], ensure_ascii=False, sort_keys=True).encode("utf-8"), digest_size=8
+).hexdigest()
+
+
+def score_components(profiles):
+    """
+    📌 여러 사용자의 항목별 건강 정보 점수를 한 번에 계산합니다.
+    반환: 규칙 이름을 열로 갖는 DataFrame
+    """
+    df = profiles if isinstance(profiles, pd.DataFrame) else pd.DataFrame(list(profiles))
+    return pd.DataFrame(
+        {name: np.asarray(kernel(df), dtype=np.int64) for name, kernel in COMPILED_RULES},
+        index=df.index,
+    )
+
+
+def health_scores(profiles):
+    """📌 여러 사용자의 건강 정보 점수 합계를 정수 배열로 반환합니다."""
+    return score_components(profiles).sum(axis=1).to_numpy(dtype=np.int64)
+
+
+def health_score(profile):
+    """
+    📌 한 사용자의 건강 정보 점수 합계 (딕셔너리 또는 UserProfile).
+    health_scores와 같은 규칙을 DataFrame 없이 평가합니다. (요청당 한 건 경로용)
+    """
+    return int(sum(kernel(profile) for _, kernel in SCALAR_RULES))
+
+
+def recommendation_messages(final_scores, recommendation_type):
+    """📌 점수 배열을 추천 메시지 배열로 변환합니다."""
+    scores = np.atleast_1d(np.asarray(final_scores, dtype=np.float64))
+    band = ACTIVE_BANDS.get(recommendation_type)
+    if band is None:
+        return np.full(len(scores), UNKNOWN_RECOMMENDATION, dtype=object)
+    # side="left": threshold < score 를 만족하는 구간 수
+    index = np.searchsorted(band["thresholds"], scores, side="left")
+    return np.asarray(band["messages"], dtype=object)[index]
@@ -2,27 +2,32 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from health_history import choose_rollup, load_history
 
-def load_user_data(user_id):
-    """💾 사용자 데이터를 불러오는 함수 (더미 데이터 사용)"""
+# 조회 단위 선택지 (화면 표시 → health_history 조회 단위)
+ROLLUP_LABELS = {"자동": None, "전체 기록": "raw", "일별 평균": "daily", "주별 평균": "weekly"}
+
+def load_user_data(user_id, rollup=None):
+    """💾 사용자 건강 기록(health_history)을 불러오는 함수 — 기록이 많으면 일별/주별로 묶어서 조회"""
     if not user_id:
         return None
 
-    dates = [datetime.now() - timedelta(days=i * 30) for i in range(6)]
-    data = {
-        'date': dates,
-        'weight': [75, 74, 73, 72, 71, 70],
-        'BMI': [26, 25.5, 25, 24.5, 24, 23.5],
-        'blood_pressure': [140, 138, 135, 132, 130, 128],
-        'cholesterol': [220, 215, 210, 205, 200, 195],
-        'exercise_score': [60, 65, 70, 75, 80, 85],
-        'diet_score': [55, 60, 65, 70, 75, 80]
-    }
-    df = pd.DataFrame(data)
-    df['date'] = df['date'].dt.strftime('%Y-%m-%d')  # 날짜 형식 변환
+    rollup = rollup or choose_rollup(user_id)
+    df = load_history(user_id, rollup=rollup)
+    df = df.rename(columns={"bmi": "BMI", "systolic_bp": "blood_pressure", "total_cholesterol": "cholesterol"})
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d %H:%M" if rollup == "raw" else "%Y-%m-%d")  # 날짜 형식 변환
     return df
 
+def trend_message(user_data, column, falling, rising, flat):
+    """첫 기록과 마지막 기록을 비교한 추세 문구"""
+    values = user_data[column].dropna()
+    if len(values) < 2:
+        return None
+    change = values.iloc[-1] - values.iloc[0]
+    if abs(change) < 1e-9:
+        return flat
+    return (falling if change < 0 else rising).format(abs(change))
+
 def display_login_visualization():
     """📊 로그인한 사용자의 건강 데이터 분석 페이지"""
     if "nickname" not in st.session_state or not st.session_state.get("logged_in"):
@@ -32,21 +37,22 @@ def display_login_visualization():
     user_id = st.session_state["nickname"]
     st.title(f"🏋️‍♂️ {user_id}님의 건강 데이터 분석")
 
-    # 사용자 데이터 불러오기
-    user_data = load_user_data(user_id)
+    # 사용자 데이터 불러오기 (해당 사용자의 기록만 인덱스로 조회)
+    rollup_label = st.selectbox("📅 조회 단위", list(ROLLUP_LABELS))
+    user_data = load_user_data(user_id, ROLLUP_LABELS[rollup_label])
     if user_data is None or user_data.empty:
-        st.error("❌ 사용자 데이터를 불러올 수 없습니다.")
+        st.info("ℹ️ 아직 건강 기록이 없습니다. 건강 정보를 저장하거나 예측을 실행하면 이곳에 변화가 기록됩니다.")
         return
 
     # 체중 변화 그래프
     st.header("📉 체중 변화 추이")
-    fig_weight = px.line(user_data, x='date', y='weight', markers=True, title="체중 변화")
+    fig_weight = px.line(user_data.dropna(subset=['weight']), x='date', y='weight', markers=True, title="체중 변화")
     fig_weight.update_layout(xaxis_title="날짜", yaxis_title="체중 (kg)")
     st.plotly_chart(fig_weight)
 
     # BMI 변화 그래프
     st.header("📊 BMI 변화 추이")
-    fig_bmi = px.line(user_data, x='date', y='BMI', markers=True, title="BMI 변화")
+    fig_bmi = px.line(user_data.dropna(subset=['BMI']), x='date', y='BMI', markers=True, title="BMI 변화")
     fig_bmi.update_layout(xaxis_title="날짜", yaxis_title="BMI")
     fig_bmi.add_hline(y=23, line_dash="dash", line_color="green", annotation_text="정상 BMI 상한선")
     st.plotly_chart(fig_bmi)
@@ -54,16 +60,20 @@ def display_login_visualization():
     # 혈압과 콜레스테롤 변화
     st.header("🩺 혈압과 콜레스테롤 변화")
     fig_bp_chol = go.Figure()
-    fig_bp_chol.add_trace(go.Scatter(x=user_data['date'], y=user_data['blood_pressure'], name="혈압", mode="lines+markers"))
-    fig_bp_chol.add_trace(go.Scatter(x=user_data['date'], y=user_data['cholesterol'], name="콜레스테롤", mode="lines+markers"))
+    fig_bp_chol.add_trace(go.Scatter(x=user_data['date'], y=user_data['blood_pressure'], name="수축기 혈압", mode="lines+markers", connectgaps=True))
+    fig_bp_chol.add_trace(go.Scatter(x=user_data['date'], y=user_data['diastolic_bp'], name="이완기 혈압", mode="lines+markers", connectgaps=True))
+    fig_bp_chol.add_trace(go.Scatter(x=user_data['date'], y=user_data['cholesterol'], name="총콜레스테롤", mode="lines+markers", connectgaps=True))
     fig_bp_chol.update_layout(title="혈압과 콜레스테롤 변화", xaxis_title="날짜", yaxis_title="수치")
     st.plotly_chart(fig_bp_chol)
 
     # 운동 점수와 식단 점수 변화
     st.header("💪 운동 점수 & 🍽️ 식단 점수 변화")
+    scores = user_data.dropna(subset=['exercise_score', 'diet_score'], how='all')
+    if scores.empty:
+        st.info("ℹ️ 예측 기록이 없습니다. '예측하기'에서 AI 예측을 실행해 보세요.")
     fig_scores = go.Figure()
-    fig_scores.add_trace(go.Bar(x=user_data['date'], y=user_data['exercise_score'], name="운동 점수", marker_color="blue"))
-    fig_scores.add_trace(go.Bar(x=user_data['date'], y=user_data['diet_score'], name="식단 점수", marker_color="orange"))
+    fig_scores.add_trace(go.Bar(x=scores['date'], y=scores['exercise_score'], name="운동 점수", marker_color="blue"))
+    fig_scores.add_trace(go.Bar(x=scores['date'], y=scores['diet_score'], name="식단 점수", marker_color="orange"))
     fig_scores.update_layout(title="운동 및 식단 점수 변화", xaxis_title="날짜", yaxis_title="점수", barmode="group")
     st.plotly_chart(fig_scores)
 
@@ -74,12 +84,19 @@ def display_login_visualization():
     summary.columns = ['날짜', '체중 (kg)', 'BMI', '혈압', '콜레스테롤', '운동 점수', '식단 점수']
     st.table(summary)
 
-    # 최종 분석 요약
-    st.markdown("""
-    **📌 분석 요약**
-    - 체중이 점진적으로 감소하고 있습니다. 목표 체중까지 지속적으로 노력하세요! 🎯
-    - BMI 값이 정상 범위(23)에 가까워지고 있습니다. 꾸준한 관리가 필요합니다. 🏆
-    - 혈압과 콜레스테롤 수치가 안정적으로 개선되고 있습니다. 👍
-    - 운동과 식단 점수가 꾸준히 상승하는 것은 좋은 신호입니다. 계속 유지하세요! 💪🔥
-    """)
-
+    # 최종 분석 요약 (첫 기록 대비 마지막 기록)
+    messages = [
+        trend_message(user_data, 'weight', "- 체중이 {:.1f}kg 감소했습니다. 목표 체중까지 지속적으로 노력하세요! 🎯",
+                      "- 체중이 {:.1f}kg 증가했습니다. 식단과 운동을 점검해 보세요. ⚖️", "- 체중이 유지되고 있습니다. 👍"),
+        trend_message(user_data, 'BMI', "- BMI가 {:.1f} 낮아졌습니다. 꾸준한 관리가 필요합니다. 🏆",
+                      "- BMI가 {:.1f} 높아졌습니다. 정상 범위(23 이하)를 목표로 관리하세요. 📈", "- BMI가 변함없이 유지되고 있습니다."),
+        trend_message(user_data, 'blood_pressure', "- 수축기 혈압이 {:.0f}mmHg 개선되었습니다. 👍",
+                      "- 수축기 혈압이 {:.0f}mmHg 높아졌습니다. 염분 섭취와 스트레스를 관리하세요. 🩺", "- 혈압이 안정적으로 유지되고 있습니다."),
+        trend_message(user_data, 'exercise_score', "- 운동 점수가 {:.0f}점 낮아졌습니다. 활동량을 늘려 보세요. 🏃",
+                      "- 운동 점수가 {:.0f}점 상승했습니다. 계속 유지하세요! 💪🔥", "- 운동 점수가 유지되고 있습니다."),
+    ]
+    messages = [message for message in messages if message]
+    if messages:
+        st.markdown("**📌 분석 요약**\n" + "\n".join(messages))
+    else:
+        st.markdown("**📌 분석 요약**\n- 기록이 두 번 이상 쌓이면 변화 추세를 분석해 드립니다.")
@@ -33,4 +33,33 @@ class FoodPredictionModel(nn.Module):
         x = self.relu(self.layer1(x))
         x = self.relu(self.layer2(x))
         x = self.layer3(x)
-        return F.sigmoid(x) * 100  # ✅ 0~100 범위로 자동 변환
\ No newline at end of file
+        return F.sigmoid(x) * 100  # ✅ 0~100 범위로 자동 변환
+
+
+# ✅ 운동 + 식단 통합 모델 (두 모델의 가중치를 블록 행렬로 합쳐 한 번에 계산)
+class DualHeadPredictionModel(nn.Module):
+    def __init__(self, input_dim, n_heads=2):
+        super(DualHeadPredictionModel, self).__init__()
+        self.layer1 = nn.Linear(input_dim, 64 * n_heads)
+        self.layer2 = nn.Linear(64 * n_heads, 32 * n_heads)
+        self.layer3 = nn.Linear(32 * n_heads, n_heads)  # 🔹 열 0: 운동, 열 1: 식단
+        self.relu = nn.ReLU()
+
+    @classmethod
+    def from_models(cls, *models):
+        """학습된 단일 출력 모델들의 가중치를 블록 행렬로 합쳐 생성"""
+        from numpy_model import extract_layers, fuse_layers
+
+        fused = fuse_layers(*[extract_layers(m) for m in models])
+        dual = cls(fused[0][0].shape[1], n_heads=len(models))
+        with torch.no_grad():
+            for layer, (weight, bias) in zip([dual.layer1, dual.layer2, dual.layer3], fused):
+                layer.weight.copy_(torch.from_numpy(weight))
+                layer.bias.copy_(torch.from_numpy(bias))
+        return dual.eval()
+
+    def forward(self, x):
+        x = self.relu(self.layer1(x))
+        x = self.relu(self.layer2(x))
+        x = self.layer3(x)
+        return F.sigmoid(x) * 100  # ✅ 0~100 범위로 자동 변환
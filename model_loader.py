@@ -1,9 +1,9 @@
-import torch
 import os
+import time
+import threading
 import streamlit as st
 import logging
-from model import ExercisePredictionModel, FoodPredictionModel  # 반드시 model.py에서 가져옴
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from numpy_model import load_numpy_model, NPZ_EXERCISE_PATH, NPZ_FOOD_PATH
 
 # 관리자용 로깅 설정 (콘솔 또는 파일에 기록)
 logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,18 +12,33 @@ logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %
 MODEL_EXERCISE_PATH = "models/model_exercise.pth"
 MODEL_FOOD_PATH = "models/model_food.pth"
 
+# 추론 백엔드: "torch" (기본) 또는 "numpy" (torch 없이 .npz 가중치로 추론)
+SCORING_BACKEND = os.getenv("SCORING_BACKEND", "torch").lower()
+
+# torch 백엔드 추론 정밀도: "fp32" (기본), "bf16", "int8" (nn.Linear 동적 양자화)
+INFERENCE_MODES = ("fp32", "bf16", "int8")
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "fp32").lower()
+
+def unwrap_state_dict(checkpoint):
+    """체크포인트가 {"model_state_dict": ...} 형태로 저장된 경우 내부 state_dict를 꺼냅니다."""
+    if isinstance(checkpoint, dict) and "model_state_dict" in checkpoint:
+        return checkpoint["model_state_dict"]
+    return checkpoint
+
 def load_model(model_path, model_class, input_dim=13):
     """
     PyTorch 모델 로드 함수.
     weights_only 옵션으로 시도하며, 실패 시 weights_only=False로 재시도합니다.
     """
+    import torch
+
     model = model_class(input_dim)
     if not os.path.exists(model_path):
         logging.error(f"🚨 모델 파일을 찾을 수 없습니다: {model_path}")
         return None
     try:
         checkpoint = torch.load(model_path, map_location=torch.device("cpu"), weights_only=True)
-        model.load_state_dict(checkpoint, strict=False)
+        model.load_state_dict(unwrap_state_dict(checkpoint), strict=False)
         model.eval()
         logging.info(f"✅ 모델 로드 성공: {model_path}")
         print(f"✅ 모델 로드 성공: {model_path}")
@@ -32,7 +47,7 @@ def load_model(model_path, model_class, input_dim=13):
         logging.error(f"🚨 모델 로드 중 오류 발생 (weights_only=True 실패): {e}")
         try:
             checkpoint = torch.load(model_path, map_location=torch.device("cpu"), weights_only=False)
-            model.load_state_dict(checkpoint, strict=False)
+            model.load_state_dict(unwrap_state_dict(checkpoint), strict=False)
             model.eval()
             logging.info(f"✅ 모델 로드 성공 (weights_only=False): {model_path}")
             print(f"✅ 모델 로드 성공 (weights_only=False): {model_path}")
@@ -41,9 +56,132 @@ def load_model(model_path, model_class, input_dim=13):
             logging.error(f"🚨 모델 로드 중 오류 발생 (weights_only=False): {e2}")
     return None
 
-# 모델 로드 실행
-model_exercise = load_model(MODEL_EXERCISE_PATH, ExercisePredictionModel, input_dim=13)
-model_food = load_model(MODEL_FOOD_PATH, FoodPredictionModel, input_dim=13)
+def load_scoring_models():
+    """
+    📌 SCORING_BACKEND 설정에 따라 운동/식단 모델을 로드합니다.
+    numpy 백엔드는 torch를 import하지 않습니다.
+    """
+    if SCORING_BACKEND == "numpy":
+        return load_numpy_model(NPZ_EXERCISE_PATH), load_numpy_model(NPZ_FOOD_PATH)
+    from model import ExercisePredictionModel, FoodPredictionModel  # 반드시 model.py에서 가져옴
+    return (
+        load_model(MODEL_EXERCISE_PATH, ExercisePredictionModel, input_dim=13),
+        load_model(MODEL_FOOD_PATH, FoodPredictionModel, input_dim=13),
+    )
+
+def apply_inference_mode(model, mode=INFERENCE_MODE):
+    """
+    📌 fp32 torch 모델에 추론 정밀도 모드를 적용한 복사본을 반환합니다.
+    - bf16: 가중치를 bfloat16으로 변환 (입력은 run 시 자동 변환)
+    - int8: nn.Linear 레이어 동적 양자화
+    NumPy 모델이나 알 수 없는 모드는 원본을 그대로 반환합니다.
+    """
+    if model is None or mode == "fp32":
+        return model
+    if SCORING_BACKEND == "numpy" or mode not in INFERENCE_MODES:
+        logging.error(f"🚨 지원하지 않는 추론 모드입니다: {mode} (backend={SCORING_BACKEND}), fp32로 실행합니다.")
+        return model
+
+    import copy
+    import torch
+    import torch.nn as nn
+
+    if mode == "bf16":
+        quantized = copy.deepcopy(model).to(torch.bfloat16)
+        quantized.inference_dtype = torch.bfloat16
+    else:
+        quantized = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    return quantized.eval()
+
+_fp32_models = None
+_scoring_models = None
+_scoring_models_lock = threading.Lock()
+
+def get_fp32_models():
+    """
+    📌 운동/식단 모델을 최초 호출 시 한 번만 로드하여 fp32 원본 (model_exercise, model_food)로 반환합니다.
+    """
+    global _fp32_models
+    if _fp32_models is None:
+        with _scoring_models_lock:
+            if _fp32_models is None:
+                start = time.perf_counter()
+                _fp32_models = load_scoring_models()
+                logging.info(f"⏱️ 예측 모델 로드 ({SCORING_BACKEND}): {time.perf_counter() - start:.3f}초")
+    return _fp32_models
+
+def get_scoring_models():
+    """
+    📌 INFERENCE_MODE가 적용된 (model_exercise, model_food)를 반환합니다.
+    """
+    global _scoring_models
+    if _scoring_models is None:
+        models = get_fp32_models()
+        with _scoring_models_lock:
+            if _scoring_models is None:
+                _scoring_models = tuple(apply_inference_mode(m) for m in models)
+    return _scoring_models
+
+_dual_head_model = None
+
+def get_dual_head_model():
+    """
+    📌 운동/식단 모델을 블록 행렬로 합친 통합 모델을 반환합니다. (출력 열 0: 운동, 1: 식단)
+    두 모델 중 하나라도 없으면 None을 반환합니다.
+    """
+    global _dual_head_model
+    if _dual_head_model is None:
+        model_exercise, model_food = get_fp32_models()  # 블록 행렬은 fp32 가중치로 만든 뒤 모드 적용
+        if model_exercise is None or model_food is None:
+            return None
+        with _scoring_models_lock:
+            if _dual_head_model is None:
+                if SCORING_BACKEND == "numpy":
+                    from numpy_model import NumpyMLP, extract_layers, fuse_layers
+                    _dual_head_model = NumpyMLP(fuse_layers(extract_layers(model_exercise), extract_layers(model_food)))
+                else:
+                    from model import DualHeadPredictionModel
+                    _dual_head_model = apply_inference_mode(DualHeadPredictionModel.from_models(model_exercise, model_food))
+    return _dual_head_model
+
+def get_model_version():
+    """
+    📌 현재 모델 파일(크기, 수정 시각)과 백엔드/정밀도 설정으로 만든 버전 태그.
+    모델 파일이 교체되면 값이 바뀝니다.
+    """
+    paths = [NPZ_EXERCISE_PATH, NPZ_FOOD_PATH] if SCORING_BACKEND == "numpy" else [MODEL_EXERCISE_PATH, MODEL_FOOD_PATH]
+    parts = [SCORING_BACKEND, INFERENCE_MODE]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append("missing")
+    return "|".join(parts)
+
+_loaded_model_version = None
+
+def refresh_models_if_changed():
+    """
+    📌 모델 파일이 바뀌었으면 로드된 모델을 버려 다음 호출 시 다시 로드되게 합니다.
+    현재 버전 태그를 반환합니다.
+    """
+    global _fp32_models, _scoring_models, _dual_head_model, _loaded_model_version
+    version = get_model_version()
+    if version != _loaded_model_version:
+        with _scoring_models_lock:
+            if version != _loaded_model_version:
+                if _loaded_model_version is not None:
+                    logging.info(f"🔄 모델 파일 변경 감지, 다시 로드합니다: {version}")
+                _fp32_models = _scoring_models = _dual_head_model = None
+                _loaded_model_version = version
+    return version
+
+def get_model_exercise():
+    return get_scoring_models()[0]
+
+def get_model_food():
+    return get_scoring_models()[1]
 
 # 환경 변수 또는 secrets.toml에서 API 키를 가져옵니다.
 HF_API_KEY = os.getenv("HF_API_KEY")  # 미리 선언된 API 키 변수
@@ -60,6 +198,9 @@ def load_gemma_model():
         if not hf_token:
             logging.error("🚨 HF_API_KEY가 설정되지 않았습니다!")
             return None, None
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+
         Gemma_tokenizer= AutoTokenizer.from_pretrained("google/gemma-2-9b-it", token=HF_API_KEY)
         print("✅ GemmaTokenizer 정상 로딩 완료!")
         model = AutoModelForCausalLM.from_pretrained(
@@ -76,6 +217,19 @@ def load_gemma_model():
         print (f"🚨 Gemma 모델 로딩 중 오류 발생: {e}")
         return None, None
 
-# Gemma 모델과 토크나이저 로드 (UI에 메시지 표시 X)
-gemma_tokenizer, gemma_model = load_gemma_model()
+def __getattr__(name):
+    """
+    기존 `from model_loader import model_exercise` 형태의 import를 위한 지연 접근자.
+    모델은 실제로 접근될 때 로드됩니다.
+    """
+    if name == "model_exercise":
+        return get_model_exercise()
+    if name == "model_food":
+        return get_model_food()
+    # Gemma 모델과 토크나이저 로드 (UI에 메시지 표시 X)
+    if name == "gemma_tokenizer":
+        return load_gemma_model()[0]
+    if name == "gemma_model":
+        return load_gemma_model()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,166 @@
+import os
+import logging
+import numpy as np
+
+# NumPy 가중치 저장 경로 (.pth → .npz 변환 결과)
+NPZ_EXERCISE_PATH = "models/model_exercise.npz"
+NPZ_FOOD_PATH = "models/model_food.npz"
+
+# 변환 대상 레이어 (model.py의 layer1 → layer2 → layer3 순서)
+LAYER_NAMES = ["layer1", "layer2", "layer3"]
+# torch 대비 허용 최대 절대 오차 (0~100 점수 기준)
+PARITY_TOLERANCE = 1e-3
+
+
+class NumpyMLP:
+    """
+    📌 model.py의 13→64→32→1 MLP를 NumPy만으로 실행하는 추론 엔진.
+    은닉층은 ReLU, 출력층은 sigmoid * 100 (0~100 점수)을 적용합니다.
+    """
+
+    def __init__(self, layers):
+        # layers: [(weight (out, in), bias (out,)), ...]
+        self.layers = [
+            (np.ascontiguousarray(w, dtype=np.float32).T, np.asarray(b, dtype=np.float32))
+            for w, b in layers
+        ]
+
+    @classmethod
+    def from_state_dict(cls, state_dict):
+        """PyTorch state_dict 형식(layerN.weight / layerN.bias)에서 생성"""
+        return cls([
+            (np.asarray(state_dict[f"{name}.weight"]), np.asarray(state_dict[f"{name}.bias"]))
+            for name in LAYER_NAMES
+        ])
+
+    @property
+    def weights(self):
+        """[(weight (out, in), bias (out,)), ...] 형식의 레이어 가중치"""
+        return [(weight_t.T, bias) for weight_t, bias in self.layers]
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        for weight_t, bias in self.layers[:-1]:
+            x = np.maximum(x @ weight_t + bias, 0.0)
+        weight_t, bias = self.layers[-1]
+        logits = x @ weight_t + bias
+        return 100.0 / (1.0 + np.exp(-logits))  # ✅ sigmoid * 100
+
+
+def extract_layers(model):
+    """📌 NumpyMLP 또는 torch 모델(layer1~3)에서 [(weight, bias), ...] NumPy 배열을 꺼냅니다."""
+    if isinstance(model, NumpyMLP):
+        return model.weights
+    return [
+        (getattr(model, name).weight.detach().cpu().numpy(), getattr(model, name).bias.detach().cpu().numpy())
+        for name in LAYER_NAMES
+    ]
+
+
+def fuse_layers(*models_layers):
+    """
+    📌 같은 입력을 받는 여러 MLP의 가중치를 블록 행렬로 합칩니다.
+    첫 레이어는 행 방향으로 이어 붙이고, 이후 레이어는 블록 대각 행렬로 만들어
+    한 번의 matmul 체인으로 모든 모델의 출력을 (N, 모델 수)로 얻습니다.
+    """
+    fused = []
+    for depth, per_model in enumerate(zip(*models_layers)):
+        weights = [w for w, _ in per_model]
+        biases = np.concatenate([b for _, b in per_model])
+        if depth == 0:
+            fused.append((np.concatenate(weights, axis=0), biases))
+            continue
+        block = np.zeros((sum(w.shape[0] for w in weights), sum(w.shape[1] for w in weights)), dtype=np.float32)
+        row = col = 0
+        for w in weights:
+            block[row:row + w.shape[0], col:col + w.shape[1]] = w
+            row += w.shape[0]
+            col += w.shape[1]
+        fused.append((block, biases))
+    return fused
+
+
+def load_numpy_model(npz_path):
+    """📌 .npz 가중치 파일에서 NumpyMLP를 로드합니다. (torch 불필요)"""
+    if not os.path.exists(npz_path):
+        logging.error(f"🚨 NumPy 가중치 파일을 찾을 수 없습니다: {npz_path}")
+        return None
+    try:
+        with np.load(npz_path) as weights:
+            model = NumpyMLP.from_state_dict(weights)
+        logging.info(f"✅ NumPy 모델 로드 성공: {npz_path}")
+        return model
+    except Exception as e:
+        logging.error(f"🚨 NumPy 모델 로드 중 오류 발생: {e}")
+        return None
+
+
+def export_weights(model_path, npz_path):
+    """📌 .pth 체크포인트를 NumPy .npz 가중치 파일로 변환합니다."""
+    import torch
+    from model_loader import unwrap_state_dict
+
+    checkpoint = torch.load(model_path, map_location=torch.device("cpu"), weights_only=True)
+    state_dict = unwrap_state_dict(checkpoint)
+    arrays = {
+        f"{name}.{param}": state_dict[f"{name}.{param}"].detach().cpu().numpy().astype(np.float32)
+        for name in LAYER_NAMES
+        for param in ("weight", "bias")
+    }
+    np.savez(npz_path, **arrays)
+    print(f"✅ 가중치 변환 완료: {model_path} → {npz_path}")
+
+
+def check_parity(torch_model, numpy_model, n_samples=1000, seed=0):
+    """
+    📌 동일한 입력에 대해 torch 모델과 NumPy 모델의 출력 차이를 비교합니다.
+    최대 절대 오차를 반환합니다.
+    """
+    import torch
+
+    rng = np.random.default_rng(seed)
+    # 실제 입력 범위와 비슷한 분포 (BMI, 허리둘레, 혈압 등)
+    features = rng.uniform(0, 250, size=(n_samples, 13)).astype(np.float32)
+    features[:, [8, 11, 12]] = rng.integers(0, 2, size=(n_samples, 3))  # 성별, 흡연상태, 음주여부
+    with torch.no_grad():
+        expected = torch_model(torch.from_numpy(features)).numpy()
+    return float(np.abs(expected - numpy_model(features)).max())
+
+
+def model_pairs():
+    """📌 [(.pth 경로, .npz 경로, torch 모델 클래스), ...] — 운동, 식단 순"""
+    from model import ExercisePredictionModel, FoodPredictionModel
+    from model_loader import MODEL_EXERCISE_PATH, MODEL_FOOD_PATH
+
+    return [
+        (MODEL_EXERCISE_PATH, NPZ_EXERCISE_PATH, ExercisePredictionModel),
+        (MODEL_FOOD_PATH, NPZ_FOOD_PATH, FoodPredictionModel),
+    ]
+
+
+def export_all():
+    """📌 모든 .pth 체크포인트를 .npz로 다시 변환합니다. (models/의 .npz 파일을 덮어씀)"""
+    for model_path, npz_path, _ in model_pairs():
+        export_weights(model_path, npz_path)
+
+
+def check_all_parity():
+    """📌 저장된 .npz 가중치와 .pth 모델의 출력을 비교합니다. 파일은 쓰지 않습니다. {npz 경로: 최대 오차}"""
+    from model_loader import load_model
+
+    return {
+        npz_path: check_parity(load_model(model_path, model_class), load_numpy_model(npz_path))
+        for model_path, npz_path, model_class in model_pairs()
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    # 기본은 비교만 수행, --export를 주면 .npz를 다시 만든 뒤 비교
+    if "--export" in sys.argv[1:]:
+        export_all()
+    for npz_path, diff in check_all_parity().items():
+        print(f"🔍 {npz_path} torch 대비 최대 오차: {diff:.2e}")
+        if diff > PARITY_TOLERANCE:
+            raise SystemExit(f"🚨 torch/NumPy 출력 불일치: {npz_path}")
@@ -0,0 +1,72 @@
+import sys
+import importlib
+import logging
+import subprocess
+import threading
+import time
+
+# ✅ 사이드바 메뉴 → (모듈 경로, 페이지 함수 이름)
+# 페이지 모듈은 해당 메뉴가 처음 선택될 때만 import 합니다.
+PAGES = {
+    "홈 화면": ("home", "display_home_page"),
+    "내 정보": ("login_visualization", "display_login_visualization"),
+    "건강 정보 입력": ("user_input", "get_user_input"),
+    "예측하기": ("prediction", "display_prediction_page"),
+    "AI 건강 코치": ("ai_coach", "display_ai_coach_page"),
+    "데이터 시각화": ("visualization", "display_visualization_page"),
+    "개발 과정": ("info", "display_info_page"),
+}
+
+_loaded_pages = {}
+_page_lock = threading.Lock()
+
+# 페이지별 최초 import 소요 시간 (초)
+PAGE_LOAD_TIMES = {}
+
+
+def get_page(menu_option):
+    """📌 메뉴 이름에 해당하는 페이지 함수를 반환합니다. (최초 선택 시 모듈 import)"""
+    if menu_option not in PAGES:
+        return None
+    page = _loaded_pages.get(menu_option)
+    if page is not None:
+        return page
+
+    with _page_lock:
+        if menu_option not in _loaded_pages:
+            module_path, func_name = PAGES[menu_option]
+            start = time.perf_counter()
+            module = importlib.import_module(module_path)
+            PAGE_LOAD_TIMES[menu_option] = time.perf_counter() - start
+            _loaded_pages[menu_option] = getattr(module, func_name)
+            logging.info(f"⏱️ 페이지 로드: {menu_option} ({module_path}) {PAGE_LOAD_TIMES[menu_option]:.3f}초")
+    return _loaded_pages[menu_option]
+
+
+def get_cold_start_report():
+    """📌 페이지별 최초 로드 시간을 느린 순으로 반환합니다."""
+    return [
+        {"페이지": menu, "모듈": PAGES[menu][0], "로드 시간(초)": round(seconds, 4)}
+        for menu, seconds in sorted(PAGE_LOAD_TIMES.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+def measure_cold_starts(menus=None):
+    """
+    📌 페이지마다 새 파이썬 프로세스에서 최초 로드 시간을 측정합니다.
+    (한 프로세스에서 차례로 import하면 먼저 로드된 페이지가 공유 의존성 비용을 모두 떠안음)
+    """
+    for menu in menus or PAGES:
+        code = f"import page_registry as r; r.get_page({menu!r}); print(r.PAGE_LOAD_TIMES[{menu!r}])"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode != 0:
+            logging.error(f"🚨 페이지 로드 실패: {menu}\n{result.stderr.strip()}")
+            continue
+        PAGE_LOAD_TIMES[menu] = float(result.stdout.strip().splitlines()[-1])
+    return get_cold_start_report()
+
+
+if __name__ == "__main__":
+    print("⏱️ 페이지별 콜드 스타트 시간 (페이지마다 새 프로세스)")
+    for row in measure_cold_starts(sys.argv[1:] or None):
+        print(f"{row['로드 시간(초)']:>8.3f}초  {row['페이지']} ({row['모듈']})")
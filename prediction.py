@@ -1,167 +1,181 @@
 import streamlit as st
-import time
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import pandas as pd
+import numpy as np
 import os
 import json
-from model_loader import model_exercise, model_food  # 모델 로더에서 모델 불러오기
-from user_data_utils import load_user_data, save_user_data
+import hashlib
+import logging
+import threading
+from cache_utils import LRUCache
+from batch_scheduler import MicroBatchScheduler
+from model_loader import get_scoring_models, get_dual_head_model, refresh_models_if_changed  # 모델 로더에서 모델 불러오기 (최초 사용 시 로드)
+from numpy_model import NumpyMLP
+from prediction_aggregates import record_prediction
+from health_history import KIND_PREDICTION, claim_prediction_run, record_health_entry, release_prediction_run
+from health_rules import RULE_COLUMNS, RULES_VERSION, health_score, health_scores, recommendation_messages
+from user_data_utils import FEATURE_KEYS, UserProfile, load_user_profile
 
 
-# 예측 결과 저장 경로
-PREDICTION_FILE = "data/predictions.csv"
+# 한 번의 forward pass에 넣을 최대 행 수
+BATCH_CHUNK_SIZE = 4096
 
-# 모델을 평가 모드로 설정
+# 최종 점수 캐시 (세션 간 공유)
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "10000"))
+score_cache = LRUCache(max_entries=SCORE_CACHE_MAX_ENTRIES)  # 모델 버전이 바뀌면 캐시 잠금 안에서 비움
 
-model_exercise.eval()
-model_food.eval()
+# 세션 간 마이크로 배칭 설정 (작은 요청을 모아 한 번의 forward pass로 처리)
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "1") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+MICRO_BATCH_TIMEOUT = 10  # 초
+_scheduler = None
+_scheduler_lock = threading.Lock()
 
-def preprocess_input(user_data):
+# 완료된 예측 실행 결과 (run_id → 결과), 같은 입력은 다시 계산/저장하지 않음
+# (프로세스 안의 결과 캐시일 뿐, 저장 여부는 health_history의 prediction_runs 테이블로 재시작 후에도 확인)
+prediction_runs = LRUCache(max_entries=SCORE_CACHE_MAX_ENTRIES)
+
+def encode_features(profiles):
     """
-    입력 데이터 전처리:
-    필수 키 값들을 숫자형 데이터로 변환하여 Tensor로 반환합니다.
+    📌 사용자 프로필 여러 개를 (N, 13) float32 배열로 한 번에 인코딩합니다.
+    profiles: DataFrame, 딕셔너리 리스트 또는 UserProfile 리스트
     """
-    required_keys = [
-        "BMI", "허리둘레", "수축기혈압(최고 혈압)", "이완기혈압(최저 혈압)",
-        "혈압 차이", "총콜레스테롤", "고혈당 위험", "간 지표",
-        "성별", "연령대", "비만 위험 지수", "흡연상태", "음주여부"
-    ]
-    processed_data = []
-    for key in required_keys:
-        value = user_data.get(key, 0)
+    if isinstance(profiles, (list, tuple)) and profiles and all(isinstance(p, UserProfile) for p in profiles):
+        return np.stack([profile.to_feature_vector() for profile in profiles])  # 프로필별로 캐시된 벡터 사용
+    df = profiles if isinstance(profiles, pd.DataFrame) else pd.DataFrame(list(profiles))
+    features = np.zeros((len(df), len(FEATURE_KEYS)), dtype=np.float32)
+    if len(df) == 0:
+        return features
+
+    for i, key in enumerate(FEATURE_KEYS):
+        if key not in df.columns:
+            continue  # 없는 컬럼은 0으로 유지
+        column = df[key]
         if key == "성별":
-            value = 1 if value in ["남성", "Male", "M"] else 0
+            features[:, i] = column.isin(["남성", "Male", "M"]).to_numpy()
         elif key == "흡연상태":
-            value = 1 if value == "흡연" else 0
+            features[:, i] = (column == "흡연").to_numpy()
         elif key == "음주여부":
-            value = 1 if value == "음주" else 0
+            features[:, i] = (column == "음주").to_numpy()
         else:
-            try:
-                value = float(value)
-            except ValueError:
-                value = 0
-        processed_data.append(value)
-    return torch.tensor([processed_data], dtype=torch.float32)
+            features[:, i] = pd.to_numeric(column, errors="coerce").fillna(0).to_numpy(dtype=np.float32)
+    return features
+
+def preprocess_input(user_data):
+    """
+    입력 데이터 전처리:
+    필수 키 값들을 숫자형 데이터로 변환하여 Tensor로 반환합니다.
+    """
+    import torch
+
+    return torch.from_numpy(encode_features([user_data]))
+
+def predict_health_scores(model, profiles, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    📌 여러 사용자의 예측 점수를 한 번에 산출합니다.
+    chunk_size 행 단위로 나누어 청크당 한 번의 forward pass를 수행하고,
+    입력 순서와 동일한 정수 점수 배열(25~100)을 반환합니다.
+    """
+    features = encode_features(profiles)
+    if model is None:
+        return np.full(len(features), 50, dtype=np.int64)  # 모델이 없으면 기본 점수 50
+    try:
+        outputs = []
+        for start in range(0, len(features), chunk_size):
+            chunk = features[start:start + chunk_size]
+            # 출력값이 다수의 요소이면 행별 평균값을 취함
+            outputs.append(run_model(model, chunk).reshape(len(chunk), -1).mean(axis=1))
+        base_scores = np.concatenate(outputs) if outputs else np.zeros(0, dtype=np.float32)
+        return np.clip(base_scores, 25, 100).astype(np.int64)
+    except Exception as e:
+        st.error(f"🚨 예측 중 오류 발생: {e}")
+        return np.full(len(features), 25, dtype=np.int64)
+
+def run_model(model, features):
+    """
+    📌 (N, 13) NumPy 배열을 모델에 통과시켜 NumPy 출력을 반환합니다.
+    NumpyMLP는 그대로 호출하고, torch 모델은 no_grad로 실행합니다.
+    """
+    if isinstance(model, NumpyMLP):
+        return model(features)
+    import torch
+
+    with torch.no_grad():
+        inputs = torch.from_numpy(features)
+        dtype = getattr(model, "inference_dtype", None)  # bf16 모드
+        if dtype is not None:
+            inputs = inputs.to(dtype)
+        return model(inputs).float().numpy()
 
 def predict_health_score(model, input_data):
     """
     모델을 사용하여 예측 점수를 산출합니다.
-    만약 모델 출력이 스칼라인 경우 그대로 사용하고, 여러 요소가 있으면 평균값을 사용합니다.
+    배치 경로(predict_health_scores)를 N=1로 호출합니다.
     """
-    if model is None:
-        return 50  # 모델이 없으면 기본 점수 50
+    return int(predict_health_scores(model, [input_data])[0])
+
+def predict_dual_health_scores(profiles, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    📌 운동/식단 통합 모델로 두 점수를 한 번의 forward pass에서 산출합니다.
+    피처 인코딩도 한 번만 수행하며, (N, 2) 정수 배열(열 0: 운동, 열 1: 식단)을 반환합니다.
+    통합 모델을 만들 수 없으면 모델별 경로로 대체합니다.
+    """
+    dual_model = get_dual_head_model()
+    if dual_model is None:
+        model_exercise, model_food = get_scoring_models()
+        return np.column_stack([
+            predict_health_scores(model_exercise, profiles, chunk_size),
+            predict_health_scores(model_food, profiles, chunk_size),
+        ])
+    features = encode_features(profiles)
     try:
-        input_tensor = preprocess_input(input_data)
-        with torch.no_grad():
-            output = model(input_tensor)
-        # 출력값이 다수의 요소이면 평균값을 취함
-        if output.numel() > 1:
-            base_value = output.mean().item()
+        if MICRO_BATCHING and 0 < len(features) < MICRO_BATCH_MAX_SIZE:
+            # 소량 요청은 다른 세션의 요청과 묶어서 실행
+            outputs = [get_scoring_scheduler().score(features, timeout=MICRO_BATCH_TIMEOUT)]
         else:
-            base_value = output.item()
-        # 모델 출력값에 60을 곱하여 0~100 사이의 점수로 보정
-        base_score = base_value
-        base_score = max(25, min(100, base_score))
-        return int(base_score)
+            outputs = [
+                run_model(dual_model, features[start:start + chunk_size])
+                for start in range(0, len(features), chunk_size)
+            ]
+        base_scores = np.concatenate(outputs) if outputs else np.zeros((0, 2), dtype=np.float32)
+        return np.clip(base_scores, 25, 100).astype(np.int64)
     except Exception as e:
         st.error(f"🚨 예측 중 오류 발생: {e}")
-        return 25
+        return np.full((len(features), 2), 25, dtype=np.int64)
+
+def get_scoring_scheduler():
+    """📌 통합 모델을 실행하는 프로세스 공용 마이크로 배치 스케줄러 (최초 호출 시 생성)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = MicroBatchScheduler(
+                    lambda features: run_model(get_dual_head_model(), features),
+                    max_batch_size=MICRO_BATCH_MAX_SIZE,
+                    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+                )
+    return _scheduler
+
+def score_profiles(profiles, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    📌 여러 사용자의 운동/식단 모델 점수를 한 번에 계산합니다.
+    입력이 DataFrame이면 같은 인덱스로 정렬된 결과를 반환합니다.
+    """
+    df = profiles if isinstance(profiles, pd.DataFrame) else pd.DataFrame(list(profiles))
+    scores = predict_dual_health_scores(df, chunk_size)
+    return pd.DataFrame({
+        "운동 예측 점수": scores[:, 0],
+        "식단 예측 점수": scores[:, 1],
+    }, index=df.index)
 
 def calculate_health_score(user_info):
     """
     건강 정보 기반 점수 계산:
     - 예를 들어, BMI가 18.5~23이면 10점, 그렇지 않으면 6점 등 정상 범위일 경우 높은 점수를 부여합니다.
+    - 기준값은 health_rules.HEALTH_RULES 규칙 테이블에서 관리합니다.
+    한 건은 스칼라 커널로 계산합니다. (여러 건은 health_scores 배치 경로 사용)
     """
-    score_components = {}
-
-    # BMI 점수 계산
-    bmi = user_info.get("BMI", 0)
-    if 18.5 <= bmi < 23:
-        score_components["BMI"] = 10
-    elif 23 <= bmi < 25:
-        score_components["BMI"] = 8
-    elif 25 <= bmi < 30:
-        score_components["BMI"] = 6
-    else:
-        score_components["BMI"] = 4
-
-    # 허리둘레 점수 계산 (성별에 따라 다른 기준 적용)
-    waist = user_info.get("허리둘레", 0)
-    gender = user_info.get("성별", "남성")
-    if gender == "남성":
-        if waist < 90:
-            score_components["허리둘레"] = 10
-        elif 90 <= waist < 100:
-            score_components["허리둘레"] = 7
-        else:
-            score_components["허리둘레"] = 4
-    else:  # 여성
-        if waist < 85:
-            score_components["허리둘레"] = 10
-        elif 85 <= waist < 95:
-            score_components["허리둘레"] = 7
-        else:
-            score_components["허리둘레"] = 4
-
-    # 혈압 점수 계산
-    systolic = user_info.get("수축기혈압(최고 혈압)", 0)
-    diastolic = user_info.get("이완기혈압(최저 혈압)", 0)
-    if 90 <= systolic <= 120 and 60 <= diastolic <= 80:
-        score_components["혈압"] = 10
-    elif 120 < systolic <= 140 or 80 < diastolic <= 90:
-        score_components["혈압"] = 7
-    else:
-        score_components["혈압"] = 4
-
-    # 총 콜레스테롤 점수 계산
-    cholesterol = user_info.get("총콜레스테롤", 0)
-    if cholesterol < 200:
-        score_components["총 콜레스테롤"] = 10
-    elif 200 <= cholesterol < 240:
-        score_components["총 콜레스테롤"] = 7
-    else:
-        score_components["총 콜레스테롤"] = 4
-
-    # 고혈당 위험 점수 계산
-    glucose_risk = user_info.get("고혈당 위험", "낮음")
-    if glucose_risk == "낮음":
-        score_components["고혈당 위험"] = 10
-    elif glucose_risk == "보통":
-        score_components["고혈당 위험"] = 7
-    else:
-        score_components["고혈당 위험"] = 4
-
-    # 간 지표 점수 계산
-    liver_index = user_info.get("간 지표", "정상")
-    if liver_index == "정상":
-        score_components["간 지표"] = 10
-    elif liver_index == "경계":
-        score_components["간 지표"] = 7
-    else:
-        score_components["간 지표"] = 4
-
-    # 흡연/음주 점수 계산
-    smoking = user_info.get("흡연상태", "비흡연")
-    drinking = user_info.get("음주여부", "비음주")
-    if smoking == "비흡연" and drinking == "비음주":
-        score_components["흡연/음주"] = 10
-    elif smoking == "비흡연" or drinking == "비음주":
-        score_components["흡연/음주"] = 7
-    else:
-        score_components["흡연/음주"] = 4
-
-    # 연령 점수 계산
-    age = user_info.get("나이", 30)
-    if age < 40:
-        score_components["연령"] = 10
-    elif 40 <= age < 60:
-        score_components["연령"] = 8
-    else:
-        score_components["연령"] = 6
-    
-    return sum(score_components.values())
+    return health_score(user_info)
 
 def get_final_health_score(model, user_info, rec_type):
     """
@@ -173,66 +187,80 @@ def get_final_health_score(model, user_info, rec_type):
     """
     predicted = predict_health_score(model, user_info)
     health = calculate_health_score(user_info)
+    return int(combine_scores(predicted, health, rec_type))
+
+def combine_scores(predicted, health, rec_type):
+    """
+    📌 모델 예측 점수와 건강 정보 점수를 rec_type별 가중치로 합칩니다.
+    스칼라와 NumPy 배열 모두 지원합니다.
+    """
     # 보정 계수: 필요 시 조정 (예: 모델의 기본 치수와 실제 사용자 차이를 보정)
     calibration_factor = 1.0
     calibrated_predicted = predicted * calibration_factor
-    
-    if rec_type == "운동":
-        final = int((calibrated_predicted * 0.3) + (health * 0.7))
-    elif rec_type == "식단":
-        final = int((calibrated_predicted * 0.2) + (health * 0.8))
-    else:
-        final = int((calibrated_predicted * 0.3) + (health * 0.7))
-    return final
+
+    if rec_type == "식단":
+        final = (calibrated_predicted * 0.2) + (health * 0.8)
+    else:  # 운동 및 기타
+        final = (calibrated_predicted * 0.3) + (health * 0.7)
+    return np.asarray(final).astype(np.int64)
+
+def get_final_health_scores(profiles, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    📌 운동/식단 최종 점수를 통합 모델로 한 번에 산출합니다.
+    건강 정보 점수(calculate_health_score)는 사용자당 한 번만 계산하여 두 점수가 공유합니다.
+    반환: "운동 점수", "식단 점수" 두 열의 DataFrame
+    """
+    df = profiles if isinstance(profiles, pd.DataFrame) else pd.DataFrame(list(profiles))
+    predicted = predict_dual_health_scores(df, chunk_size)
+    health = health_scores(df).astype(np.float64)
+    return pd.DataFrame({
+        "운동 점수": combine_scores(predicted[:, 0], health, "운동"),
+        "식단 점수": combine_scores(predicted[:, 1], health, "식단"),
+    }, index=df.index)
+
+def make_score_cache_key(user_info, model_version):
+    """
+    📌 인코딩된 13개 피처 + 규칙 입력값 + 모델 버전으로 캐시 키를 만듭니다.
+    점수에 영향을 주지 않는 필드(이름, 목표 체중 등)는 키에 포함되지 않습니다.
+    규칙 테이블 버전(RULES_VERSION)도 함께 반영합니다.
+    """
+    user_info = UserProfile.from_dict(user_info)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(user_info.to_feature_vector().tobytes())
+    rule_inputs = [user_info.get(key) for key in RULE_COLUMNS]
+    digest.update(json.dumps(rule_inputs, ensure_ascii=False, default=str).encode("utf-8"))
+    digest.update(model_version.encode("utf-8"))
+    digest.update(RULES_VERSION.encode("utf-8"))
+    return digest.hexdigest()
+
+def get_cached_final_health_scores(user_info):
+    """
+    📌 (운동 점수, 식단 점수)를 캐시에서 찾고, 없으면 계산 후 저장합니다.
+    모델 파일이 바뀌면 캐시를 비우고 모델을 다시 로드합니다.
+    user_info: 딕셔너리 또는 UserProfile
+    """
+    user_info = UserProfile.from_dict(user_info)
+    version = refresh_models_if_changed()
+    key = make_score_cache_key(user_info, version)
+    scores = score_cache.get(key, version=version)  # 버전 확인/비우기와 조회를 한 번의 잠금으로
+    if scores is None:
+        # 한 건: DataFrame 없이 캐시된 피처 벡터와 스칼라 규칙 커널로 계산
+        predicted = predict_dual_health_scores([user_info])[0]
+        health = calculate_health_score(user_info)
+        scores = (int(combine_scores(predicted[0], health, "운동")), int(combine_scores(predicted[1], health, "식단")))
+        score_cache.put(key, scores, version=version)
+    return scores
 
 def generate_recommendation(final_score, recommendation_type):
-    """추천 메시지 생성 함수"""
-    if recommendation_type == "운동":
-        if final_score > 90:
-            return "🏆 최고의 운동 습관! 꾸준한 운동이 건강을 지키는 열쇠입니다."
-        elif final_score > 80:
-            return "🥇 훌륭한 운동 습관입니다. 조금 더 강도 있는 운동을 고려해 보세요."
-        elif final_score > 70:
-            return "🥈 좋은 운동 습관입니다! 다양한 운동을 시도해 보세요."
-        elif final_score > 60:
-            return "🥉 꾸준한 운동을 하고 계시네요! 유산소와 근력 운동을 균형 있게 조합해 보세요."
-        elif final_score > 50:
-            return "⚠️ 운동량을 늘려보세요. 하루 30분 정도의 걷기부터 시작해 보세요."
-        elif final_score > 40:
-            return "⚠️ 운동 부족입니다. 가벼운 스트레칭부터 시작하세요."
-        elif final_score > 30:
-            return "❗ 규칙적인 운동 계획이 필요합니다. 매일 조금씩 시작해 보세요."
-        elif final_score > 20:
-            return "❗❗ 운동이 매우 부족합니다. 가능한 한 매일 몸을 움직이세요."
-        else:
-            return "❗❗❗ 건강에 적신호입니다! 즉시 전문가와 상담하세요."
-    elif recommendation_type == "식단":
-        if final_score > 90:
-            return "🏆 완벽한 식단 관리! 균형 잡힌 영양 섭취를 유지하세요."
-        elif final_score > 80:
-            return "🥇 매우 건강한 식습관입니다. 식단을 계속 유지하세요!"
-        elif final_score > 70:
-            return "🥈 좋은 식습관입니다. 신선한 채소와 과일을 더 늘려 보세요."
-        elif final_score > 60:
-            return "🥉 괜찮은 식단입니다. 가공식품을 줄이고 자연식 위주로 개선해 보세요."
-        elif final_score > 50:
-            return "⚠️ 식단 개선이 필요합니다. 탄수화물과 단백질의 균형을 맞춰 보세요."
-        elif final_score > 40:
-            return "⚠️ 건강한 식습관을 위해 더 많은 신선한 재료를 섭취해 보세요."
-        elif final_score > 30:
-            return "❗ 식단 개선이 필요합니다. 매 끼니에 영양소를 골고루 포함시키세요!"
-        elif final_score > 20:
-            return "❗❗ 식단이 매우 불균형합니다. 전문가의 상담이 필요합니다."
-        else:
-            return "❗❗❗ 건강에 위험 신호가 감지됩니다. 즉시 전문가와 상담하세요."
-    else:
-        return "🚨 알 수 없는 추천 유형입니다."
+    """추천 메시지 생성 함수 (점수 구간은 health_rules.RECOMMENDATION_BANDS에서 관리)"""
+    return recommendation_messages(final_score, recommendation_type)[0]
 
 def display_prediction_page():
     st.header("🔍 AI 기반 운동 및 식단 예측")
     user_id = st.session_state.get("nickname", "게스트")
-    user_data = load_user_data(user_id)
-    
+    profile = load_user_profile(user_id)  # 예전 키 이름/문자열 값은 여기서 한 번만 정리
+    user_data = profile.to_dict() if profile else None
+
     if user_data:
         st.subheader("📌 사용자 정보")
         display_columns = [
@@ -253,40 +281,92 @@ def display_prediction_page():
             "활동 수준": "활동 수준"
         }
         user_info_df = pd.DataFrame([{column_descriptions.get(col, col): user_data.get(col, 'N/A') for col in display_columns}])
-        
     else:
         st.error("사용자 정보가 없어 예측을 실행할 수 없습니다. 먼저 사용자 정보를 입력해주세요.")
     
+    if not user_data:
+        return
+
+    run_id = make_run_id(user_id, user_data)
+    run = prediction_runs.get(run_id)
+
     if st.button("🔮 AI 예측 실행", help="클릭하여 AI 기반 운동 및 식단 예측을 시작합니다."):
-        with st.spinner("⏳ AI가 데이터를 분석 중입니다..."):
-            time.sleep(2)
-    
-    if user_data:
-        prob_exercise = get_final_health_score(model_exercise, user_data, "운동")
-        prob_food = get_final_health_score(model_food, user_data, "식단")
-        
-        exercise_recommendation = generate_recommendation(prob_exercise, "운동")
-        diet_recommendation = generate_recommendation(prob_food, "식단")
-        
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #6e8efb, #a777e3); border-radius: 15px; padding: 20px; color: white; box-shadow: 0 10px 20px rgba(0,0,0,0.2); margin-bottom: 30px;">
-            <h2 style="text-align: center;"><span style="font-size: 36px;">🏋️‍♂️</span> 운동 건강 점수</h2>
-            <div style="font-size: 48px; font-weight: bold; text-align: center;">{prob_exercise}</div>
-            <div style="background-color: rgba(255,255,255,0.1); border-radius: 10px; padding: 15px; margin-top: 15px; font-size: 18px; text-align: center;">{exercise_recommendation}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        st.markdown(f"""
-        <div style="background: linear-gradient(135deg, #6e8efb, #a777e3); border-radius: 15px; padding: 20px; color: white; box-shadow: 0 10px 20px rgba(0,0,0,0.2); margin-bottom: 30px;">
-            <h2 style="text-align: center;"><span style="font-size: 36px;">🥗</span> 식단 건강 점수</h2>
-            <div style="font-size: 48px; font-weight: bold; text-align: center;">{prob_food}</div>
-            <div style="background-color: rgba(255,255,255,0.1); border-radius: 10px; padding: 15px; margin-top: 15px; font-size: 18px; text-align: center;">{diet_recommendation}</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        save_prediction_for_visualization(user_id, user_data, prob_exercise, prob_food)
+        if run is None:
+            run = execute_prediction_run(run_id, user_id, profile)
+        else:
+            st.info("ℹ️ 입력 정보가 바뀌지 않아 이전 예측 결과를 표시합니다.")
+
+    if run is None:
+        st.info("👆 버튼을 눌러 AI 예측을 실행하세요.")
+        return
+
+    prob_exercise, prob_food = run["운동 점수"], run["식단 점수"]
+    exercise_recommendation, diet_recommendation = run["운동 추천"], run["식단 추천"]
+
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, #6e8efb, #a777e3); border-radius: 15px; padding: 20px; color: white; box-shadow: 0 10px 20px rgba(0,0,0,0.2); margin-bottom: 30px;">
+        <h2 style="text-align: center;"><span style="font-size: 36px;">🏋️‍♂️</span> 운동 건강 점수</h2>
+        <div style="font-size: 48px; font-weight: bold; text-align: center;">{prob_exercise}</div>
+        <div style="background-color: rgba(255,255,255,0.1); border-radius: 10px; padding: 15px; margin-top: 15px; font-size: 18px; text-align: center;">{exercise_recommendation}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown(f"""
+    <div style="background: linear-gradient(135deg, #6e8efb, #a777e3); border-radius: 15px; padding: 20px; color: white; box-shadow: 0 10px 20px rgba(0,0,0,0.2); margin-bottom: 30px;">
+        <h2 style="text-align: center;"><span style="font-size: 36px;">🥗</span> 식단 건강 점수</h2>
+        <div style="font-size: 48px; font-weight: bold; text-align: center;">{prob_food}</div>
+        <div style="background-color: rgba(255,255,255,0.1); border-radius: 10px; padding: 15px; margin-top: 15px; font-size: 18px; text-align: center;">{diet_recommendation}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.success("🎉 분석이 완료되었습니다! 아래 버튼을 클릭하여 상세한 맞춤 계획을 받아보세요.")
+    if st.button("📋 맞춤 건강 계획 받기"):
+        st.balloons()
+        st.info("🚀 축하합니다! 당신만의 맞춤 건강 여정이 시작되었습니다. 함께 건강해져 봐요!")
+
+def make_run_id(user_id, user_data):
+    """
+    📌 사용자 ID + 프로필 내용 + 모델/규칙 버전으로 예측 실행 ID를 만듭니다.
+    같은 입력이면 같은 ID가 나오므로 재렌더링 시 결과를 재사용할 수 있습니다.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(user_id).encode("utf-8"))
+    digest.update(json.dumps(user_data, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    digest.update(refresh_models_if_changed().encode("utf-8"))
+    digest.update(RULES_VERSION.encode("utf-8"))
+    return digest.hexdigest()
+
+def execute_prediction_run(run_id, user_id, profile):
+    """
+    📌 예측 실행 1회: 점수 계산 → 추천 생성 → 결과 저장을 진행률과 함께 수행합니다.
+    결과는 prediction_runs에 run_id로 보관되어 같은 입력에 대해 다시 계산/저장하지 않습니다.
+    이미 저장된 run_id(재시작 전 실행 포함)는 점수만 다시 계산하고 로그에 다시 추가하지 않습니다.
+    """
+    progress = st.progress(0, text="⏳ AI가 건강 점수를 계산 중입니다...")
+    prob_exercise, prob_food = get_cached_final_health_scores(profile)
+
+    progress.progress(50, text="📝 맞춤 추천을 생성 중입니다...")
+    run = {
+        "run_id": run_id,
+        "운동 점수": prob_exercise,
+        "식단 점수": prob_food,
+        "운동 추천": generate_recommendation(prob_exercise, "운동"),
+        "식단 추천": generate_recommendation(prob_food, "식단"),
+    }
+
+    progress.progress(80, text="💾 예측 결과를 저장 중입니다...")
+    if claim_prediction_run(run_id, user_id):
+        try:
+            save_prediction_for_visualization(user_id, profile, prob_exercise, prob_food)
+        except Exception:
+            release_prediction_run(run_id)  # 저장되지 않았으니 다음 실행에서 다시 저장
+            raise
     else:
-        st.error("사용자 정보가 없어 예측을 실행할 수 없습니다. 먼저 사용자 정보를 입력해주세요.")
+        st.info("ℹ️ 같은 입력의 예측 결과가 이미 저장되어 있어 다시 저장하지 않습니다.")
+    prediction_runs.put(run_id, run)
+
+    progress.progress(100, text="✅ 분석 완료!")
+    return run
 
 def calculate_age_group(age):
     """
@@ -315,23 +395,15 @@ def calculate_age_group(age):
 
 def save_prediction_for_visualization(user_id, user_data, prob_exercise, prob_food):
     """
-    예측 결과를 CSV 파일에 저장합니다.
+    예측 결과를 추가 전용 예측 로그(prediction_log)와 사용자 건강 기록(health_history)에 저장합니다.
     """
+    # 정규 스키마 필드만 기록 (extras에 남은 예전 키나 자격 증명이 로그에 들어가지 않도록)
+    user_data = UserProfile.from_dict(user_data).to_record()
+    user_data.setdefault("user_id", str(user_id))
     user_data["운동 점수"] = prob_exercise
     user_data["식단 점수"] = prob_food
     user_data["연령대"] = calculate_age_group(user_data.get("나이", 0))
-    user_data["예측 날짜"] = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-    new_data = pd.DataFrame([user_data])
-    PREDICTION_FILE = "data/predictions.csv"
-    if os.path.exists(PREDICTION_FILE):
-        df = pd.read_csv(PREDICTION_FILE)
-        df = pd.concat([df, new_data], ignore_index=True)
-    else:
-        df = new_data
-    df.to_csv(PREDICTION_FILE, index=False)
-    st.success("🎉 분석이 완료되었습니다! 아래 버튼을 클릭하여 상세한 맞춤 계획을 받아보세요.")
-    if st.button("📋 맞춤 건강 계획 받기"):
-        st.balloons()
-        st.info("🚀 축하합니다! 당신만의 맞춤 건강 여정이 시작되었습니다. 함께 건강해져 봐요!")
-    else:
-        st.error("⚠️ 사용자 정보가 없습니다. 먼저 기본 정보를 입력해주세요.")
+    predicted_at = pd.Timestamp.now()
+    user_data["예측 날짜"] = predicted_at.strftime("%Y-%m-%d %H:%M:%S")
+    record_prediction(user_data)  # 예측 로그 추가 + 시각화 집계도 한 건만큼 갱신
+    record_health_entry(user_id, user_data, kind=KIND_PREDICTION, recorded_at=predicted_at)
@@ -0,0 +1,196 @@
+"""
+📊 예측 결과 집계 저장소
+
+성별/연령대별 점수 합계(count, sum, sum of squares)와 점수 히스토그램(고정 구간)을 보관합니다.
+예측 한 건이 저장될 때마다 O(1)로 갱신되므로, 시각화 페이지의 집계 차트는 전체 예측 수와 무관하게 그려집니다.
+
+재계산: python prediction_aggregates.py (예측 히스토리 전체로 다시 만듭니다)
+"""
+import os
+import json
+import math
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+from prediction_log import append_prediction, file_lock, read_predictions
+
+PREDICTION_AGGREGATES_FILE = os.getenv("PREDICTION_AGGREGATES_FILE", "data/prediction_aggregates.json")
+
+# 그룹별 집계 대상
+GROUP_COLUMNS = ["성별", "연령대"]
+METRIC_COLUMNS = ["운동 점수", "식단 점수", "BMI"]
+# 히스토그램 대상과 고정 구간 (0~100점, 10점 단위 — 범위를 벗어난 값은 양 끝 구간에 포함)
+HISTOGRAM_COLUMNS = ["운동 점수", "식단 점수"]
+HISTOGRAM_EDGES = np.linspace(0, 100, 11)
+
+# 재계산과 한 건 반영은 같은 잠금 안에서만: 스레드 잠금(프로세스 안) + 파일 잠금(프로세스 간)
+_update_lock = threading.Lock()
+_cache_lock = threading.Lock()
+_cache = {"signature": None, "state": None}
+
+
+def empty_aggregates():
+    return {
+        "rows": 0,
+        "groups": {column: {} for column in GROUP_COLUMNS},
+        "histograms": {column: [0] * (len(HISTOGRAM_EDGES) - 1) for column in HISTOGRAM_COLUMNS},
+    }
+
+
+def _number(value):
+    """집계할 수 있는 숫자면 float, 아니면 None (결측은 집계에서 제외)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _histogram_bin(value):
+    index = int(np.searchsorted(HISTOGRAM_EDGES, value, side="right")) - 1
+    return min(max(index, 0), len(HISTOGRAM_EDGES) - 2)
+
+
+def _add_record(state, record):
+    """예측 한 건을 집계에 더합니다. (그룹 수 × 지표 수만큼의 덧셈)"""
+    state["rows"] += 1
+    metrics = {column: _number(record.get(column)) for column in METRIC_COLUMNS}
+    for group_column in GROUP_COLUMNS:
+        key = record.get(group_column)
+        if key is None or (isinstance(key, float) and math.isnan(key)):
+            continue
+        group = state["groups"][group_column].setdefault(
+            str(key), {column: [0, 0.0, 0.0] for column in METRIC_COLUMNS}
+        )
+        for column, value in metrics.items():
+            if value is not None:
+                stats = group[column]
+                stats[0] += 1
+                stats[1] += value
+                stats[2] += value * value
+    for column in HISTOGRAM_COLUMNS:
+        value = metrics[column]
+        if value is not None:
+            state["histograms"][column][_histogram_bin(value)] += 1
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write(path, state):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _aggregates_lock(path):
+    with _update_lock, file_lock(f"{path}.lock"):
+        yield
+
+
+def rebuild_aggregates(path=PREDICTION_AGGREGATES_FILE):
+    """📌 예측 히스토리 전체로 집계를 다시 계산해 저장합니다. 집계한 행 수를 반환합니다."""
+    with _aggregates_lock(path):
+        state = _rebuild(path)
+    return state["rows"]
+
+
+def _rebuild(path):
+    """(잠금 안에서 호출)"""
+    state = empty_aggregates()
+    df = read_predictions()
+    for record in df.to_dict("records"):
+        _add_record(state, record)
+    _write(path, state)
+    logging.info(f"✅ 예측 집계를 {state['rows']}행으로 다시 계산했습니다.")
+    return state
+
+
+def update_aggregates(record, path=PREDICTION_AGGREGATES_FILE):
+    """
+    📌 새 예측 한 건을 집계에 반영합니다. (전체 히스토리 크기와 무관)
+    집계 파일이 아직 없으면 히스토리 전체로 먼저 만듭니다. (이 경우 record는 히스토리에 이미 포함)
+    """
+    with _aggregates_lock(path):
+        _update(record, path)
+
+
+def _update(record, path):
+    """(잠금 안에서 호출)"""
+    if not os.path.exists(path):
+        _rebuild(path)
+        return
+    state = _read(path)
+    _add_record(state, record)
+    _write(path, state)
+
+
+def record_prediction(record, path=PREDICTION_AGGREGATES_FILE):
+    """
+    📌 예측 한 건을 예측 로그에 추가하고 집계에 반영합니다.
+    로그 추가와 집계 반영을 한 잠금 안에서 하므로, 그 사이에 재계산이 끼어들어
+    같은 행이 재계산과 한 건 반영으로 두 번 세어지는 일이 없습니다.
+    집계 갱신 실패는 기록만 하고 넘어갑니다. (로그는 이미 저장됨)
+    """
+    with _aggregates_lock(path):
+        append_prediction(record)
+        try:
+            _update(record, path)
+        except (OSError, ValueError) as e:
+            logging.error(f"🚨 예측 집계 갱신 실패 (python prediction_aggregates.py로 재계산): {e}")
+
+
+def load_aggregates(path=PREDICTION_AGGREGATES_FILE):
+    """📌 집계 상태를 반환합니다. 파일이 바뀌지 않았으면 다시 읽지 않습니다. (반환값은 수정하지 마세요)"""
+    signature = _signature(path)
+    if signature is None:
+        with _aggregates_lock(path):
+            if not os.path.exists(path):  # 잠금을 기다리는 동안 다른 쪽이 만들었을 수 있음
+                _rebuild(path)
+        signature = _signature(path)
+    with _cache_lock:
+        if _cache["signature"] != signature:
+            _cache.update(signature=signature, state=_read(path))
+        return _cache["state"]
+
+
+def aggregates_version(path=PREDICTION_AGGREGATES_FILE):
+    """📌 집계 데이터 버전 토큰 (집계 파일의 mtime/크기 — 예측이 반영될 때마다 바뀜)"""
+    load_aggregates(path)  # 파일이 없으면 먼저 만듦
+    return "{}:{}".format(*_signature(path))
+
+
+def group_summary(group_column, metric, path=PREDICTION_AGGREGATES_FILE):
+    """📌 그룹별 [group_column, 평균, 표준편차, 건수] 목록 (집계 값으로 계산)"""
+    rows = []
+    for key, stats in load_aggregates(path)["groups"][group_column].items():
+        count, total, total_sq = stats[metric]
+        if count == 0:
+            continue
+        mean = total / count
+        variance = max(total_sq / count - mean * mean, 0.0)
+        rows.append({group_column: key, metric: mean, "표준편차": math.sqrt(variance), "건수": count})
+    return rows
+
+
+def histogram(column, path=PREDICTION_AGGREGATES_FILE):
+    """📌 (구간 경계 배열, 구간별 건수 배열)"""
+    return HISTOGRAM_EDGES, np.asarray(load_aggregates(path)["histograms"][column])
+
+
+if __name__ == "__main__":
+    print(f"✅ 예측 집계 재계산 완료: {rebuild_aggregates()}행 → {PREDICTION_AGGREGATES_FILE}")
@@ -0,0 +1,216 @@
+import os
+import re
+import io
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+try:
+    import fcntl  # 프로세스 간 파일 잠금 (Linux/macOS)
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# 기존 예측 결과 CSV (읽기 전용 히스토리로 유지)
+LEGACY_PREDICTION_FILE = "data/predictions.csv"
+# 추가 전용 예측 로그 세그먼트 디렉터리 (JSON Lines)
+PREDICTION_LOG_DIR = os.getenv("PREDICTION_LOG_DIR", "data/prediction_log")
+# 세그먼트 교체 기준: 크기 또는 날짜
+SEGMENT_MAX_BYTES = int(os.getenv("PREDICTION_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+# fsync 묶음 처리: N건마다 또는 N초마다
+FSYNC_EVERY = int(os.getenv("PREDICTION_FSYNC_EVERY", "16"))
+FSYNC_INTERVAL = float(os.getenv("PREDICTION_FSYNC_INTERVAL", "1.0"))
+
+SEGMENT_PATTERN = re.compile(r"^predictions-(\d{8})-(\d{4})\.jsonl$")
+
+
+@contextmanager
+def file_lock(lock_path):
+    """📌 프로세스 간 배타적 파일 잠금 (fcntl이 없는 환경에서는 잠금 없이 진행)"""
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def segment_name(day, index):
+    return f"predictions-{day}-{index:04d}.jsonl"
+
+
+def list_segments(log_dir=PREDICTION_LOG_DIR):
+    """📌 로그 세그먼트 파일 경로를 (날짜, 번호) 순으로 반환합니다."""
+    if not os.path.isdir(log_dir):
+        return []
+    names = sorted(name for name in os.listdir(log_dir) if SEGMENT_PATTERN.match(name))
+    return [os.path.join(log_dir, name) for name in names]
+
+
+class PredictionLogWriter:
+    """
+    📌 예측 결과를 JSON Lines 세그먼트에 추가만 하는 로그 작성기.
+    - 한 건 추가 비용은 전체 히스토리 크기와 무관합니다.
+    - 스레드 잠금 + 파일 잠금(flock)으로 동시 작성 시 행 유실을 막습니다.
+    - fsync는 FSYNC_EVERY건 또는 FSYNC_INTERVAL초마다 한 번 수행합니다.
+      (추가가 멈춰도 대기 중인 행은 타이머가 FSYNC_INTERVAL초 안에 fsync합니다)
+    - 세그먼트는 SEGMENT_MAX_BYTES를 넘거나 날짜가 바뀌면 새 파일로 교체됩니다.
+    """
+
+    def __init__(self, log_dir=PREDICTION_LOG_DIR, max_bytes=SEGMENT_MAX_BYTES,
+                 fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._day = None
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self._timer = None
+
+    def _open_segment(self, day):
+        """오늘 날짜의 마지막 세그먼트를 열거나, 가득 찼으면 다음 번호로 새로 만듭니다."""
+        indexes = [
+            int(match.group(2))
+            for match in (SEGMENT_PATTERN.match(os.path.basename(path)) for path in list_segments(self.log_dir))
+            if match.group(1) == day
+        ]
+        index = max(indexes, default=0)
+        path = os.path.join(self.log_dir, segment_name(day, index))
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+            path = os.path.join(self.log_dir, segment_name(day, index + 1))
+        self._close_segment()
+        self._file = open(path, "a", encoding="utf-8")
+        self._day = day
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule_sync(self):
+        """대기 중인 행이 있으면 남은 간격 뒤에 fsync하는 타이머를 겁니다. (이미 걸려 있으면 그대로)"""
+        if self._timer is not None:
+            return
+        delay = max(self.fsync_interval - (time.monotonic() - self._last_fsync), 0.0)
+        self._timer = threading.Timer(delay, self._timed_sync)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            if self._file is None or not self._pending:
+                return
+            try:
+                self._sync()
+            except (OSError, ValueError) as e:
+                logging.error(f"🚨 예측 로그 fsync 실패: {e}")
+
+    def append(self, record):
+        """📌 예측 결과 한 건(딕셔너리)을 로그 끝에 추가합니다."""
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock, file_lock(os.path.join(self.log_dir, ".lock")):
+            day = datetime.now().strftime("%Y%m%d")
+            if (self._file is None or day != self._day
+                    or os.fstat(self._file.fileno()).st_size >= self.max_bytes
+                    or not os.path.exists(self._file.name)):
+                self._open_segment(day)
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+            else:
+                self._schedule_sync()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+
+
+_writer = PredictionLogWriter()
+atexit.register(_writer.close)
+
+
+def append_prediction(record):
+    """📌 공용 로그 작성기로 예측 결과 한 건을 추가합니다."""
+    _writer.append(record)
+
+
+def _read_segment(path):
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    if not content.strip():
+        return pd.DataFrame()
+    try:
+        return pd.read_json(io.StringIO(content), lines=True, dtype=False, convert_dates=False)
+    except ValueError:
+        # 마지막 줄이 쓰는 도중 잘린 경우: 완성된 줄만 읽음
+        complete = content[:content.rfind("\n") + 1]
+        logging.error(f"🚨 예측 로그 세그먼트의 불완전한 줄을 건너뜁니다: {path}")
+        if not complete.strip():
+            return pd.DataFrame()
+        return pd.read_json(io.StringIO(complete), lines=True, dtype=False, convert_dates=False)
+
+
+def read_segment_from(path, offset=0):
+    """
+    📌 세그먼트의 offset 바이트 이후에 추가된 완성된 줄만 읽습니다.
+    (새 행 DataFrame, 다음에 읽을 offset)을 반환합니다.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        content = f.read()
+    end = content.rfind(b"\n") + 1  # 쓰는 중인 마지막 줄은 다음에 읽음
+    if end == 0:
+        return pd.DataFrame(), offset
+    text = content[:end].decode("utf-8")
+    if not text.strip():
+        return pd.DataFrame(), offset + end
+    return pd.read_json(io.StringIO(text), lines=True, dtype=False, convert_dates=False), offset + end
+
+
+def history_version(log_dir=PREDICTION_LOG_DIR, legacy_file=LEGACY_PREDICTION_FILE):
+    """
+    📌 예측 히스토리의 데이터 버전 토큰 (기존 CSV와 각 세그먼트의 mtime/크기)
+    로그는 추가만 되므로 새 예측이 저장되면 토큰이 바뀝니다. 파일 내용은 읽지 않습니다.
+    """
+    parts = []
+    for path in ([legacy_file] if legacy_file else []) + list_segments(log_dir):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        parts.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts)
+
+
+def read_predictions(log_dir=PREDICTION_LOG_DIR, legacy_file=LEGACY_PREDICTION_FILE):
+    """
+    📌 기존 CSV와 모든 로그 세그먼트를 하나의 DataFrame으로 합쳐 반환합니다.
+    데이터가 전혀 없으면 빈 DataFrame을 반환합니다.
+    """
+    frames = []
+    if legacy_file and os.path.exists(legacy_file):
+        frames.append(pd.read_csv(legacy_file))
+    frames.extend(_read_segment(path) for path in list_segments(log_dir))
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
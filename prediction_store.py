@@ -0,0 +1,288 @@
+import os
+import json
+import uuid
+from urllib.parse import quote
+import logging
+import pandas as pd
+from cache_utils import LRUCache
+from prediction_log import (
+    LEGACY_PREDICTION_FILE, PREDICTION_LOG_DIR, file_lock, history_version, list_segments, read_predictions,
+    read_segment_from
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow가 없으면 예측 로그를 직접 읽어 메모리에서 필터링
+    pa = pq = None
+
+# 예측일 / 연령대로 파티션된 Parquet 저장소
+PREDICTION_STORE_DIR = os.getenv("PREDICTION_STORE_DIR", "data/prediction_store")
+MANIFEST_FILE = "_manifest.json"
+PARTITION_COLUMNS = ["예측일", "연령대"]
+# 파티션 안의 파일 수가 이 값을 넘으면 하나로 합침
+COMPACT_THRESHOLD = 16
+
+# 저장 스키마 (기존 predictions.csv 컬럼 기준), 여기 없는 컬럼은 저장하지 않음
+STRING_COLUMNS = [
+    "user_id", "성별", "연령대", "고혈당 위험", "고혈압 위험", "고혈당 위험.1",
+    "활동 수준", "흡연상태", "음주여부", "간 지표", "예측 날짜", "예측일",
+]
+NUMERIC_COLUMNS = [
+    "나이", "키", "현재 체중", "목표 체중", "BMI", "허리둘레", "수축기혈압(최고 혈압)",
+    "이완기혈압(최저 혈압)", "식전혈당(공복혈당)", "혈압 차이", "총콜레스테롤", "HDL콜레스테롤",
+    "LDL콜레스테롤", "트리글리세라이드", "비만 위험 지수", "운동 개선 필요성", "운동 점수",
+    "식단 개선 필요성", "식단 점수",
+]
+
+# 타입 지정 로딩 스키마 (load_predictions)
+# 연령대: 순서 있는 범주 (목록에 없는 값은 숫자 순으로 뒤에 추가)
+AGE_GROUP_ORDER = ["0-9세", "10대", "20대", "30대", "40대", "50대", "60대", "60대 이상", "70대 이상"]
+ORDERED_CATEGORIES = {
+    "연령대": AGE_GROUP_ORDER,
+    "활동 수준": ["저활동", "중간활동", "고활동"],
+}
+CATEGORY_COLUMNS = ["성별", "고혈당 위험", "고혈압 위험", "고혈당 위험.1", "흡연상태", "음주여부", "간 지표", "예측일"]
+DATE_COLUMNS = ["예측 날짜"]
+FRAME_CACHE_MAX_ENTRIES = 8
+
+_manifest_cache = None
+_frame_cache = LRUCache(max_entries=FRAME_CACHE_MAX_ENTRIES)
+
+
+def _schema():
+    return pa.schema(
+        [(name, pa.string()) for name in STRING_COLUMNS if name not in PARTITION_COLUMNS]
+        + [(name, pa.float64()) for name in NUMERIC_COLUMNS]
+        + [(name, pa.string()) for name in PARTITION_COLUMNS]
+    )
+
+
+def _normalize(df):
+    """스키마에 맞게 컬럼을 고르고 타입을 통일합니다. (파일마다 스키마가 달라지지 않도록)"""
+    out = pd.DataFrame(index=df.index)
+    for name in STRING_COLUMNS:
+        if name == "예측일":
+            continue
+        column = df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        out[name] = column.where(column.isna(), column.astype(str)).astype(object)
+    for name in NUMERIC_COLUMNS:
+        column = df[name] if name in df.columns else pd.Series(dtype="float64", index=df.index)
+        out[name] = pd.to_numeric(column, errors="coerce").astype("float64")
+    out["예측일"] = out["예측 날짜"].str.slice(0, 10).fillna("unknown")
+    return out
+
+
+def _load_manifest(store_dir):
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {"legacy_ingested": False, "segments": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _has_new_data(manifest, log_dir, legacy_file):
+    if not manifest["legacy_ingested"] and legacy_file and os.path.exists(legacy_file):
+        return True
+    return any(
+        os.path.getsize(path) > manifest["segments"].get(os.path.basename(path), 0)
+        for path in list_segments(log_dir)
+    )
+
+
+def _partition_value(value):
+    """pyarrow hive 파티션 디렉터리 이름과 같은 방식으로 값을 인코딩 (빈 값은 기본 파티션)"""
+    return "__HIVE_DEFAULT_PARTITION__" if pd.isna(value) else quote(str(value), safe="")
+
+
+def _compact(partition_dir):
+    """파티션 안의 작은 Parquet 파일들을 하나로 합칩니다."""
+    parts = sorted(name for name in os.listdir(partition_dir) if name.endswith(".parquet"))
+    if len(parts) <= COMPACT_THRESHOLD:
+        return
+    table = pa.concat_tables([pq.read_table(os.path.join(partition_dir, name)) for name in parts])
+    pq.write_table(table, os.path.join(partition_dir, f"part-{uuid.uuid4().hex}-compact.parquet"))
+    for name in parts:
+        os.remove(os.path.join(partition_dir, name))
+
+
+def sync_store(store_dir=PREDICTION_STORE_DIR, log_dir=PREDICTION_LOG_DIR, legacy_file=LEGACY_PREDICTION_FILE):
+    """
+    📌 기존 CSV와 예측 로그에서 아직 반영되지 않은 행만 Parquet 저장소에 추가합니다.
+    새 데이터가 없으면 파일 상태 확인만 하고 바로 반환합니다. 추가한 행 수를 반환합니다.
+    """
+    global _manifest_cache
+    if _manifest_cache is not None and not _has_new_data(_manifest_cache, log_dir, legacy_file):
+        return 0
+
+    with file_lock(os.path.join(store_dir, ".lock")):
+        manifest = _load_manifest(store_dir)
+        frames = []
+        if not manifest["legacy_ingested"] and legacy_file and os.path.exists(legacy_file):
+            frames.append(pd.read_csv(legacy_file))
+            manifest["legacy_ingested"] = True
+        for path in list_segments(log_dir):
+            name = os.path.basename(path)
+            offset = manifest["segments"].get(name, 0)
+            if os.path.getsize(path) > offset:
+                new_rows, manifest["segments"][name] = read_segment_from(path, offset)
+                frames.append(new_rows)
+
+        frames = [frame for frame in frames if not frame.empty]
+        added = 0
+        if frames:
+            df = _normalize(pd.concat(frames, ignore_index=True))
+            pq.write_to_dataset(
+                pa.Table.from_pandas(df, schema=_schema(), preserve_index=False),
+                root_path=store_dir,
+                partition_cols=PARTITION_COLUMNS,
+                basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            for day, age_group in df[PARTITION_COLUMNS].drop_duplicates().itertuples(index=False):
+                partition_dir = os.path.join(store_dir, f"예측일={_partition_value(day)}", f"연령대={_partition_value(age_group)}")
+                if os.path.isdir(partition_dir):
+                    _compact(partition_dir)
+            added = len(df)
+            logging.info(f"✅ 예측 저장소에 {added}행 추가")
+        _save_manifest(store_dir, manifest)
+        _manifest_cache = manifest
+    return added
+
+
+def _apply_filters(df, filters):
+    for column, op, value in filters or []:
+        if column not in df.columns:
+            return df.iloc[0:0]
+        if op == "==":
+            df = df[df[column] == value]
+        elif op == "in":
+            df = df[df[column].isin(value)]
+        else:
+            raise ValueError(f"지원하지 않는 필터 연산자: {op}")
+    return df
+
+
+def query_predictions(columns=None, filters=None, store_dir=PREDICTION_STORE_DIR):
+    """
+    📌 예측 히스토리를 조회합니다.
+    columns: 읽을 컬럼 목록 (None이면 전체)
+    filters: [(컬럼, "==" 또는 "in", 값), ...] — 파티션 컬럼(예측일, 연령대) 조건은 디렉터리 단위로 건너뜁니다.
+    pyarrow가 없으면 예측 로그 전체를 읽어 메모리에서 필터링합니다.
+    """
+    if pq is None:
+        df = _apply_filters(read_predictions(), filters)
+        if columns is not None:
+            df = df[[column for column in columns if column in df.columns]]
+        return df.reset_index(drop=True)
+
+    sync_store(store_dir)
+    if not os.path.isdir(store_dir) or not any(name.startswith("예측일=") for name in os.listdir(store_dir)):
+        return pd.DataFrame(columns=columns or [])
+    table = pq.read_table(
+        store_dir,
+        columns=columns,
+        filters=filters or None,
+        partitioning="hive",
+        schema=_schema(),
+    )
+    return table.to_pandas()
+
+
+def _age_key(value):
+    digits = "".join(ch if ch.isdigit() else " " for ch in str(value)).split()
+    return int(digits[0]) if digits else float("inf")
+
+
+def age_group_dtype(values=()):
+    """📌 연령대 순서 범주 타입 (AGE_GROUP_ORDER + 처음 보는 값은 숫자 순으로 추가)"""
+    extra = sorted({str(value) for value in values if pd.notna(value)} - set(AGE_GROUP_ORDER), key=_age_key)
+    return pd.CategoricalDtype(AGE_GROUP_ORDER + extra, ordered=True)
+
+
+def sort_age_groups(values):
+    """📌 연령대 값 목록을 나이 순으로 정렬합니다."""
+    return list(pd.Categorical(list(values), dtype=age_group_dtype(values)).sort_values())
+
+
+def apply_schema(df):
+    """
+    📌 예측 DataFrame에 명시적 타입을 적용합니다.
+    - 범주형 문자열 컬럼 → category (연령대, 활동 수준은 순서 있는 범주)
+    - 숫자 컬럼 → 결측이 없는 정수는 가장 작은 정수 타입, 나머지는 float32
+    - 예측 날짜 → datetime64
+    """
+    df = df.copy()
+    for name, order in ORDERED_CATEGORIES.items():
+        if name in df.columns:
+            values = df[name].dropna().unique()
+            dtype = age_group_dtype(values) if name == "연령대" else pd.CategoricalDtype(
+                order + sorted(set(map(str, values)) - set(order)), ordered=True)
+            df[name] = df[name].astype(object).where(df[name].isna(), df[name].astype(str)).astype(dtype)
+    for name in CATEGORY_COLUMNS:
+        if name in df.columns:
+            df[name] = df[name].astype("category")
+    for name in NUMERIC_COLUMNS:
+        if name in df.columns:
+            column = pd.to_numeric(df[name], errors="coerce")
+            if column.notna().all() and (column % 1 == 0).all():
+                df[name] = pd.to_numeric(column.astype("int64"), downcast="integer")
+            else:
+                df[name] = column.astype("float32")
+    for name in DATE_COLUMNS:
+        if name in df.columns:
+            df[name] = pd.to_datetime(df[name], errors="coerce", format="mixed")
+    return df
+
+
+def _cache_key(columns, filters):
+    frozen_filters = tuple(
+        (column, op, tuple(value) if isinstance(value, (list, set, tuple)) else value)
+        for column, op, value in filters or []
+    )
+    return tuple(columns) if columns is not None else None, frozen_filters
+
+
+def load_predictions(columns=None, filters=None):
+    """
+    📌 타입이 지정된 예측 DataFrame을 반환합니다. (query_predictions + apply_schema)
+    같은 (컬럼, 필터) 조회는 예측 히스토리가 바뀔 때까지 캐시된 DataFrame을 공유합니다. (반환값은 수정하지 마세요)
+    """
+    return load_predictions_versioned(columns, filters)[0]
+
+
+def load_predictions_versioned(columns=None, filters=None):
+    """
+    📌 load_predictions와 같지만 (DataFrame, 데이터 버전 토큰)을 반환합니다.
+    DataFrame에서 파생한 캐시(행 위치 인덱스 등)는 이 토큰을 키로 써야 다른 버전의 DataFrame과 섞이지 않습니다.
+    """
+    version = history_version()
+    key = (_cache_key(columns, filters), version)
+    df = _frame_cache.get(key)
+    if df is None:
+        df = apply_schema(query_predictions(columns=columns, filters=filters))
+        _frame_cache.put(key, df)
+    return df, version
+
+
+def memory_report(df):
+    """📌 컬럼별 타입과 메모리 사용량(바이트) DataFrame (마지막 행은 합계)"""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": usage})
+    report.loc["합계"] = ["", int(usage.sum())]
+    return report
+
+
+if __name__ == "__main__":
+    raw = query_predictions()
+    typed = load_predictions()
+    print("📊 예측 히스토리 메모리 사용량 (기본 타입 → 스키마 적용)")
+    print(pd.concat([memory_report(raw), memory_report(typed)], axis=1, keys=["기본", "스키마"]).to_string())
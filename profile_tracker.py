@@ -0,0 +1,50 @@
+import json
+import hashlib
+import streamlit as st
+from user_data_utils import load_user_data, save_user_data
+from health_history import record_health_entry
+
+_TRACKER_KEY = "profile_tracker"
+
+
+def profile_hash(data):
+    """📌 프로필 내용 해시 (키 순서와 무관)"""
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _tracker_entry(user_id):
+    trackers = st.session_state.setdefault(_TRACKER_KEY, {})
+    entry = trackers.get(str(user_id))
+    if entry is None:
+        stored = load_user_data(user_id)
+        entry = trackers[str(user_id)] = {
+            "saved_hash": profile_hash(stored) if stored else None,  # 마지막으로 저장된 내용
+            "session_hash": None,  # 세션 상태에 반영된 내용
+        }
+    return entry
+
+
+def _persist(user_id, entry, digest, data):
+    save_user_data(user_id, data)
+    record_health_entry(user_id, data)  # 저장할 때마다 건강 기록(시계열)에도 추가
+    entry["saved_hash"] = digest
+
+
+def track_profile(user_id, data):
+    """
+    📌 제출된 프로필을 마지막 저장본과 비교하여 실제로 바뀐 경우에만 저장합니다.
+    (입력 폼이 제출 시에만 값을 넘기므로 연속 입력은 이미 한 번의 저장으로 묶입니다)
+    저장했으면 True, 내용이 같아 쓰지 않았으면 False를 반환합니다.
+    """
+    entry = _tracker_entry(user_id)
+    digest = profile_hash(data)
+
+    if entry["session_hash"] != digest:  # 세션 상태도 바뀐 경우에만 직렬화
+        st.session_state["user_data"] = json.dumps(data)
+        entry["session_hash"] = digest
+
+    if digest == entry["saved_hash"]:
+        return False
+    _persist(user_id, entry, digest, data)
+    return True
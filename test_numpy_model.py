@@ -0,0 +1,41 @@
+import hashlib
+import numpy as np
+import pytest
+from numpy_model import PARITY_TOLERANCE, check_parity, load_numpy_model, model_pairs
+
+torch = pytest.importorskip("torch")
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.mark.parametrize("model_path, npz_path, model_class", model_pairs())
+def test_committed_npz_matches_torch(model_path, npz_path, model_class):
+    """저장소의 .npz 가중치가 .pth 모델과 같은 출력을 내는지 (파일은 변경하지 않음)"""
+    from model_loader import load_model
+
+    before = _digest(npz_path)
+    numpy_model = load_numpy_model(npz_path)
+    assert numpy_model is not None
+    diff = check_parity(load_model(model_path, model_class), numpy_model, n_samples=512, seed=1234)
+    assert diff <= PARITY_TOLERANCE
+    assert _digest(npz_path) == before
+
+
+def test_fixed_inputs_match_torch():
+    """고정 입력(실제 값 범위의 프로필 3건)에서 행 단위로 torch와 같은 점수"""
+    from model import ExercisePredictionModel
+    from model_loader import MODEL_EXERCISE_PATH, load_model
+
+    features = np.array([
+        [22.5, 80.0, 118, 76, 42, 180, 0, 0, 1, 30, 3.6, 0, 1],
+        [31.2, 102.0, 145, 95, 50, 260, 1, 1, 0, 60, 3.3, 1, 1],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ], dtype=np.float32)
+    torch_model = load_model(MODEL_EXERCISE_PATH, ExercisePredictionModel)
+    with torch.no_grad():
+        expected = torch_model(torch.from_numpy(features)).numpy()
+    actual = load_numpy_model(model_pairs()[0][1])(features)
+    np.testing.assert_allclose(actual, expected, atol=PARITY_TOLERANCE)
@@ -1,20 +1,73 @@
 import json
 import os
+import sqlite3
+import threading
 import streamlit as st
+import numpy as np
 import pandas as pd
+import user_store
+from cache_utils import LRUCache
 
 # 사용자 데이터 파일 경로 정의
 USER_DATA_FILE = "data/user_data.json"
 
+# 사용자 저장소: "sqlite" (기본, data/user_data.db) 또는 "json" (기존 파일 전체 저장 방식)
+USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "sqlite").lower()
+
+# user_data.json 읽기 캐시 (프로세스 공용, 파일 mtime/크기로 유효성 확인)
+_json_cache_lock = threading.Lock()
+_json_cache = {"signature": None, "data": {}}
+json_cache_stats = {"hits": 0, "misses": 0}
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def read_user_mapping():
+    """
+    📌 user_data.json 전체 {user_id: data} 매핑을 반환합니다.
+    파일의 mtime과 크기가 마지막 파싱 때와 같으면 다시 파싱하지 않습니다.
+    파일이 없으면 None, 손상되었으면 json.JSONDecodeError를 발생시킵니다.
+    반환된 매핑은 공유 객체이므로 수정하지 마세요.
+    """
+    try:
+        signature = _file_signature(USER_DATA_FILE)
+    except FileNotFoundError:
+        return None
+    with _json_cache_lock:  # 동시 세션은 한 번의 파싱 결과를 공유
+        if _json_cache["signature"] == signature:
+            json_cache_stats["hits"] += 1
+            return _json_cache["data"]
+        json_cache_stats["misses"] += 1
+        with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        _json_cache.update(signature=signature, data=data)
+        return data
+
+def write_user_mapping(data):
+    """📌 user_data.json 전체를 저장하고, 읽기 캐시를 저장한 내용으로 바로 갱신합니다."""
+    os.makedirs(os.path.dirname(USER_DATA_FILE), exist_ok=True)
+    with _json_cache_lock:
+        with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            stat = os.fstat(f.fileno())
+        _json_cache.update(signature=(stat.st_mtime_ns, stat.st_size), data=data)
+
 def load_user_data(user_id):
     """📌 사용자 데이터 로드"""
+    if USER_STORE_BACKEND == "sqlite":
+        try:
+            return user_store.get_user(user_id)
+        except sqlite3.Error as e:
+            st.error(f"🚨 사용자 데이터 로드 중 오류 발생: {e}")
+            return None
     try:
-        if not os.path.exists(USER_DATA_FILE):
+        data = read_user_mapping()
+        if data is None:
             return None  # 파일이 없으면 None 반환
-
-        with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get(str(user_id), None)  # user_id는 문자열로 저장될 가능성이 있음
+        user_data = data.get(str(user_id), None)  # user_id는 문자열로 저장될 가능성이 있음
+        return dict(user_data) if user_data is not None else None
     except json.JSONDecodeError:
         st.warning(f"🚨 사용자 데이터 파일({USER_DATA_FILE})이 손상되었습니다. 기본값을 사용합니다.")
         return None
@@ -24,20 +77,24 @@ def load_user_data(user_id):
 
 def save_user_data(user_id, data):
     """📌 사용자 데이터 저장"""
+    if USER_STORE_BACKEND == "sqlite":
+        try:
+            user_store.upsert_user(user_id, data)
+        except sqlite3.Error as e:
+            st.error(f"❌ 사용자 정보 저장 중 오류 발생: {e}")
+        finally:
+            _profile_cache.discard(str(user_id))  # 커밋 후 무효화 (그 사이 읽힌 예전 프로필이 남지 않도록)
+        return
     try:
-        os.makedirs(os.path.dirname(USER_DATA_FILE), exist_ok=True)
-        
         # 기존 데이터 로드 또는 빈 딕셔너리
         existing_data = load_existing_data()
 
         # 새 데이터 추가 또는 업데이트
         existing_data[str(user_id)] = data
 
-        # 수정된 데이터를 파일에 저장
-        with open(USER_DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, indent=4, ensure_ascii=False)
-    
-  
+        # 수정된 데이터를 파일에 저장 (읽기 캐시도 함께 갱신)
+        write_user_mapping(existing_data)
+        _profile_cache.discard(str(user_id))
     except IOError as e:
         st.error(f"❌ 사용자 정보 저장 중 오류 발생: {e}")
     except Exception as e:
@@ -45,14 +102,202 @@ def save_user_data(user_id, data):
 
 def load_existing_data():
     """📌 기존 데이터를 로드하거나 빈 딕셔너리를 반환"""
+    if USER_STORE_BACKEND == "sqlite":
+        try:
+            return user_store.get_all_users()
+        except sqlite3.Error as e:
+            st.error(f"🚨 사용자 데이터 로드 중 오류 발생: {e}")
+            return {}
     try:
-        if os.path.exists(USER_DATA_FILE):
-            with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        data = read_user_mapping()
+        if data is not None:
+            return dict(data)  # 호출자가 수정해도 캐시는 그대로 유지
     except json.JSONDecodeError:
         st.warning(f"⚠️ 사용자 데이터 파일({USER_DATA_FILE})이 손상되어 초기화합니다.")
     return {}  # 파일이 없거나 손상되었으면 빈 딕셔너리 반환
 
+# 모델 입력 피처 (순서 고정)
+FEATURE_KEYS = [
+    "BMI", "허리둘레", "수축기혈압(최고 혈압)", "이완기혈압(최저 혈압)",
+    "혈압 차이", "총콜레스테롤", "고혈당 위험", "간 지표",
+    "성별", "연령대", "비만 위험 지수", "흡연상태", "음주여부"
+]
+
+# 정규 프로필 스키마: (속성 이름, 저장 키, 타입, 예전 키 목록)
+# 작성 위치마다 달랐던 키 이름(키 / 키 (cm) 등)은 여기서 한 번만 정규 키로 맞춥니다.
+# 타입이 object인 필드는 작성한 쪽의 값을 그대로 유지합니다. (숫자/문자열이 섞여 저장되는 필드)
+PROFILE_FIELDS = [
+    ("user_id", "user_id", str, ()),
+    ("gender", "성별", str, ()),
+    ("age", "나이", int, ()),
+    ("age_group", "연령대", object, ()),  # 예: 40 (5세 단위) 또는 "40대"
+    ("height", "키", float, ("키 (cm)",)),
+    ("waist", "허리둘레", float, ("허리둘레 (cm)",)),
+    ("weight", "현재 체중", float, ("현재 체중 (kg)",)),
+    ("goal_weight", "목표 체중", float, ("목표 체중 (kg)",)),
+    ("systolic_bp", "수축기혈압(최고 혈압)", float, ("수축기혈압",)),
+    ("diastolic_bp", "이완기혈압(최저 혈압)", float, ("이완기혈압",)),
+    ("fasting_glucose", "식전혈당(공복혈당)", float, ("식전혈당",)),
+    ("hdl", "HDL콜레스테롤", float, ()),
+    ("ldl", "LDL콜레스테롤", float, ()),
+    ("triglyceride", "트리글리세라이드", float, ()),
+    ("liver_index", "간 지표", object, ()),  # 예: 40.0 (입력 폼 계산값) 또는 "정상"
+    ("glucose_risk", "고혈당 위험", str, ()),
+    ("smoking", "흡연상태", str, ()),
+    ("drinking", "음주여부", str, ()),
+    ("activity_level", "활동 수준", str, ()),
+    # 파생 필드: 저장된 값이 없으면 입력값으로 계산
+    ("bp_diff", "혈압 차이", float, ()),
+    ("total_cholesterol", "총콜레스테롤", float, ()),
+    ("bmi", "BMI", float, ()),
+    ("obesity_risk", "비만 위험 지수", float, ()),
+]
+# 자격 증명 키: 프로필(extras 포함)에 절대 싣지 않음 (credentials 테이블에만 보관)
+CREDENTIAL_KEYS = {"password"}
+_FIELD_BY_KEY = {key: (name, value_type) for name, key, value_type, _ in PROFILE_FIELDS}
+_KNOWN_KEYS = {alias for *_, aliases in PROFILE_FIELDS for alias in aliases} | set(_FIELD_BY_KEY)
+
+
+def _coerce(value, value_type):
+    """저장된 값을 필드 타입으로 변환합니다. 비어 있거나 변환할 수 없으면 None"""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value == "":
+        return None
+    if isinstance(value, list):
+        value = value[0] if value else None
+        return _coerce(value, value_type)
+    if value_type is object:
+        return value
+    try:
+        if value_type is int:
+            return int(float(value))
+        return value_type(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _feature_value(value):
+    """피처 인코딩용 숫자 변환 (숫자가 아니면 0)"""
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return 0.0
+    return 0.0 if np.isnan(number) else number
+
+
+class UserProfile:
+    """
+    📌 정규 스키마로 정리된 사용자 프로필 레코드.
+    from_dict()에서 예전 키 이름과 문자열 값을 한 번만 정리하고,
+    파생 값(BMI, 총콜레스테롤 등)과 모델 피처 벡터는 생성 시 계산해 재사용합니다.
+    스키마에 없는 키(비밀번호, 예전 코드값 등)는 extras에 그대로 보관합니다.
+    """
+
+    __slots__ = tuple(name for name, *_ in PROFILE_FIELDS) + ("extras", "_features", "_dict")
+
+    def __init__(self, **fields):
+        for name, _, value_type, _ in PROFILE_FIELDS:
+            setattr(self, name, _coerce(fields.get(name), value_type))
+        self.extras = fields.get("extras") or {}
+        self._fill_derived()
+        self._features = None
+        self._dict = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """📌 저장된 딕셔너리(예전 키 포함)를 정규 프로필로 변환합니다."""
+        if isinstance(data, cls):
+            return data
+        data = data or {}
+        fields = {}
+        for name, key, _, aliases in PROFILE_FIELDS:
+            for candidate in (key, *aliases):
+                if data.get(candidate) is not None:
+                    fields[name] = data[candidate]
+                    break
+        fields["extras"] = {
+            key: value for key, value in data.items() if key not in _KNOWN_KEYS and key not in CREDENTIAL_KEYS
+        }
+        return cls(**fields)
+
+    def _fill_derived(self):
+        if self.bp_diff is None and self.systolic_bp is not None and self.diastolic_bp is not None:
+            self.bp_diff = self.systolic_bp - self.diastolic_bp
+        if self.total_cholesterol is None and None not in (self.ldl, self.hdl, self.triglyceride):
+            self.total_cholesterol = self.ldl + self.hdl + self.triglyceride
+        if self.bmi is None and self.height and self.weight:
+            self.bmi = round(self.weight / ((self.height / 100) ** 2), 2)
+        if self.obesity_risk is None and self.waist is not None and self.bmi:
+            self.obesity_risk = round(self.waist / self.bmi, 2)
+
+    def get(self, key, default=None):
+        """📌 저장 키(예: "BMI", "키")로 값을 조회합니다. (딕셔너리와 같은 방식)"""
+        field = _FIELD_BY_KEY.get(key)
+        value = getattr(self, field[0]) if field else self.extras.get(key)
+        return default if value is None else value
+
+    def to_dict(self):
+        """📌 정규 키 딕셔너리 (비어 있는 필드는 제외, extras 포함). 캐시된 객체이므로 수정하지 마세요."""
+        if self._dict is None:
+            data = dict(self.extras)
+            for name, key, _, _ in PROFILE_FIELDS:
+                value = getattr(self, name)
+                if value is not None:
+                    data[key] = value
+            self._dict = data
+        return self._dict
+
+    def to_record(self):
+        """📌 정규 스키마(PROFILE_FIELDS) 필드만 담은 새 딕셔너리 (extras 제외 — 예측 로그 등 외부 기록용)"""
+        return {key: getattr(self, name) for name, key, _, _ in PROFILE_FIELDS if getattr(self, name) is not None}
+
+    def to_feature_vector(self):
+        """📌 FEATURE_KEYS 순서의 (13,) float32 모델 입력 (prediction.encode_features와 같은 인코딩)"""
+        if self._features is None:
+            features = np.zeros(len(FEATURE_KEYS), dtype=np.float32)
+            for i, key in enumerate(FEATURE_KEYS):
+                value = self.get(key)
+                if key == "성별":
+                    features[i] = value in ("남성", "Male", "M")
+                elif key == "흡연상태":
+                    features[i] = value == "흡연"
+                elif key == "음주여부":
+                    features[i] = value == "음주"
+                else:
+                    features[i] = _feature_value(value)
+            features.flags.writeable = False
+            self._features = features
+        return self._features
+
+
+# 정규화된 프로필 캐시 (user_id → (저장소 버전 토큰, UserProfile))
+# 조회할 때마다 저장소 버전을 확인하므로 다른 프로세스에서 저장한 변경도 반영됩니다.
+_profile_cache = LRUCache(max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "1024")))
+
+def _profile_version(user_id):
+    """저장소의 사용자 버전 토큰 (sqlite: 행의 updated_at, json: 파일 mtime/크기). 확인할 수 없으면 None"""
+    try:
+        if USER_STORE_BACKEND == "sqlite":
+            return user_store.get_user_version(user_id)
+        return _file_signature(USER_DATA_FILE)
+    except (sqlite3.Error, OSError):
+        return None
+
+def load_user_profile(user_id):
+    """📌 사용자 프로필을 UserProfile로 불러옵니다. 없으면 None"""
+    # 버전은 데이터보다 먼저 읽음: 그 사이 저장되면 다음 조회에서 버전이 달라져 다시 읽음
+    version = _profile_version(user_id)
+    cached = _profile_cache.get(str(user_id))
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+    data = load_user_data(user_id)
+    if not data:
+        _profile_cache.discard(str(user_id))
+        return None
+    profile = UserProfile.from_dict(data)
+    if version is not None:
+        _profile_cache.put(str(user_id), (version, profile))
+    return profile
+
 def get_safe_value(value, default, value_type=int):
     """📌 안전하게 값을 변환"""
     try:
@@ -98,15 +343,16 @@ def display_user_info_table(user_info):
         st.warning("⚠️ 표시할 사용자 정보가 없습니다.")
         return
 
-    # 표시할 정보 선택 및 정렬
+    # 표시할 정보 선택 및 정렬 (예전 키 이름은 UserProfile에서 정규 키로 맞춤)
+    profile = UserProfile.from_dict(user_info)
     display_info = {
-        "성별": user_info.get("성별", "미입력"),
-        "연령대": user_info.get("연령대", "미입력"),
-        "키 (cm)": user_info.get("키 (cm)", "미입력"),
-        "현재 체중 (kg)": user_info.get("현재 체중", "미입력"),
-        "목표 체중 (kg)": user_info.get("목표 체중", "미입력"),
-        "BMI": user_info.get("BMI", "미입력"),
-        "활동 수준": user_info.get("활동 수준", "미입력"),
+        "성별": profile.get("성별", "미입력"),
+        "연령대": profile.get("연령대", "미입력"),
+        "키 (cm)": profile.get("키", "미입력"),
+        "현재 체중 (kg)": profile.get("현재 체중", "미입력"),
+        "목표 체중 (kg)": profile.get("목표 체중", "미입력"),
+        "BMI": profile.get("BMI", "미입력"),
+        "활동 수준": profile.get("활동 수준", "미입력"),
     }
     
     # DataFrame 생성 및 표시
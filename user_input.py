@@ -1,18 +1,11 @@
 import streamlit as st
 import pandas as pd
-import os
-import torch
 import json
-from user_data_utils import load_user_data, save_user_data  
-import re
-import hashlib
-import io
-from PIL import Image
-import pytesseract
+from user_data_utils import UserProfile, load_user_data
 
 
-# 스타일 적용
-st.markdown("""
+# 스타일 (페이지 렌더링마다 한 번만 주입)
+PAGE_STYLE = """
 <style>
     .stApp {
         background-color: #f0f4f8;
@@ -83,8 +76,47 @@ st.markdown("""
         padding: 5px;
         font-size: 16px;
     }
+    .dataframe {
+        border-collapse: separate;
+        border-spacing: 0;
+        width: 100%;
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        font-size: 0.9em;
+        box-shadow: 0 2px 15px rgba(64,64,64,.1);
+        border-radius: 12px;
+        overflow: hidden;
+    }
+    .dataframe thead tr {
+        background-color: #3498db;
+        color: #ffffff;
+        text-align: left;
+    }
+    .dataframe th, .dataframe td {
+        padding: 12px 15px;
+    }
+    .dataframe th {
+        font-weight: 600;
+        text-transform: uppercase;
+        font-size: 0.85em;
+        letter-spacing: 0.5px;
+    }
+    .dataframe tbody tr {
+        transition: background-color 0.3s ease;
+    }
+    .dataframe tbody tr:hover {
+        background-color: rgba(52, 152, 219, 0.1);
+    }
+    .dataframe tbody tr:nth-of-type(even) {
+        background-color: #f8f9fa;
+    }
+    .dataframe tbody td {
+        border-bottom: 1px solid #e9ecef;
+    }
+    .dataframe tbody tr:last-of-type td {
+        border-bottom: none;
+    }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # 사용자 데이터 파일 경로 정의
 USER_DATA_FILE = "data/user_data.json"
@@ -97,12 +129,43 @@ def get_user_input(user_id):
 
     st.title("🏥 건강 정보 입력")
 
+def calculate_derived_metrics(user_data, existing_data):
+    """📌 입력값으로 BMI, 총콜레스테롤, 간 지표, 비만 위험 지수 등 파생 지표를 계산합니다. (폼 제출 시에만 호출)"""
+    height, weight, waist = user_data["키"], user_data["현재 체중"], user_data["허리둘레"]
+    bmi = round(weight / ((height / 100) ** 2), 2) if height > 0 else 0.0
+    liver_health_index = round(
+        (existing_data.get("혈청지오티(AST)", 30) + existing_data.get("혈청지피티(ALT)", 40) + existing_data.get("감마지티피", 50)) / 3, 2
+    )
+    return {
+        "혈압 차이": user_data["수축기혈압(최고 혈압)"] - user_data["이완기혈압(최저 혈압)"],
+        "총콜레스테롤": user_data["LDL콜레스테롤"] + user_data["HDL콜레스테롤"] + user_data["트리글리세라이드"],
+        "간 지표": liver_health_index,
+        "BMI": bmi,
+        "비만 위험 지수": round(waist / bmi, 2) if bmi > 0 else 0.0,
+    }
+
+
+def display_preview(user_data):
+    """📌 입력한 데이터 미리보기 표"""
+    selected_columns = ["user_id", "성별", "나이", "허리둘레", "BMI", "총콜레스테롤", "혈압 차이", "식전혈당(공복혈당)", "간 지표", "비만 위험 지수", "활동 수준"]
+    if any(col not in user_data for col in selected_columns):
+        return
+
+    st.markdown("<h4 style='text-align: center; color: #1f618d;'>🔍 입력한 데이터 미리보기</h4>", unsafe_allow_html=True)
+    df_selected = pd.DataFrame([{col: user_data[col] for col in selected_columns}])
+
+    # 데이터프레임을 HTML 테이블로 변환
+    html_table = df_selected.to_html(index=False, classes='dataframe')
+    st.markdown(html_table, unsafe_allow_html=True)
+
+
 def get_user_input(existing_data, user_id):
     """
     📌 사용자 정보를 입력받아 반환하는 함수
+    입력 위젯은 하나의 폼으로 묶여 있어 값을 바꿔도 다시 실행되지 않고, 저장 버튼을 누를 때 한 번만 처리됩니다.
     :param existing_data: 기존 사용자 데이터 (딕셔너리)
     :param user_id: 사용자 ID (닉네임 등)
-    :return: 새로운 사용자 데이터 (딕셔너리)
+    :return: 제출된 새로운 사용자 데이터 (딕셔너리), 제출하지 않았으면 None
     """
     if existing_data is None:
         existing_data = {}
@@ -112,103 +175,99 @@ def get_user_input(existing_data, user_id):
             existing_data = json.loads(existing_data)
         except json.JSONDecodeError:
             existing_data = {}
+    existing_data = UserProfile.from_dict(existing_data).to_dict()  # 예전 키 이름(키 (cm) 등)을 정규 키로
+
+    def default(key, fallback):
+        """숫자 입력 기본값 (정수 위젯에 맞게 변환)"""
+        return int(round(existing_data.get(key, fallback)))
 
-    # ✅ 기본 정보 입력
-    st.header("🏥 건강 정보 입력")
-    st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
-    with st.container():
+    st.markdown(PAGE_STYLE, unsafe_allow_html=True)
+
+    with st.form("health_input_form"):
+        # ✅ 기본 정보 입력
+        st.header("🏥 건강 정보 입력")
+        st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
         col1, col2 = st.columns(2)
         with col1:
-            gender = st.radio("성별", ["남성", "여성"], 
+            gender = st.radio("성별", ["남성", "여성"],
                               index=0 if existing_data.get("성별", "남성") == "남성" else 1)
         with col2:
-            age = st.slider("나이", min_value=10, max_value=150, 
-                            value=existing_data.get("나이", 30))
+            age = st.slider("나이", min_value=10, max_value=150,
+                            value=default("나이", 30))
 
-    st.markdown("---")  # 구분선 추가
+        st.markdown("---")  # 구분선 추가
 
-    # ✅ 신체 측정 정보 입력
-    st.header("📏 신체 측정")
-    with st.container():
-            col1, col2 = st.columns(2)
-            with col1:
-                height = st.number_input("키 (cm)", min_value=100, max_value=250, 
-                                     value=existing_data.get("키 (cm)", 170))
-            with col2:
-                waist = st.number_input("허리둘레 (cm)", min_value=50, max_value=150, 
-                                    value=existing_data.get("허리둘레", 80))
-            st.info("📌 복부비만 기준  남성: 90cm(35.4인치) 이상, 여성: 85cm(33.5인치) 이상 입니다.")    
+        # ✅ 신체 측정 정보 입력
+        st.header("📏 신체 측정")
+        col1, col2 = st.columns(2)
+        with col1:
+            height = st.number_input("키 (cm)", min_value=100, max_value=250,
+                                     value=default("키", 170))
+        with col2:
+            waist = st.number_input("허리둘레 (cm)", min_value=50, max_value=150,
+                                    value=default("허리둘레", 80))
+        st.info("📌 복부비만 기준  남성: 90cm(35.4인치) 이상, 여성: 85cm(33.5인치) 이상 입니다.")
 
-            st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
-            with st.container():
-                col1, col2= st.columns(2)
-                with col1:
-                    weight = st.number_input("현재 체중 (kg)", min_value=30, max_value=200, 
-                                    value=existing_data.get("현재 체중", 70))
+        st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
+        col1, col2 = st.columns(2)
+        with col1:
+            weight = st.number_input("현재 체중 (kg)", min_value=30, max_value=200,
+                                     value=default("현재 체중", 70))
+        with col2:
+            goal_weight = st.number_input("목표 체중 (kg)", min_value=30, max_value=200,
+                                          value=default("목표 체중", 60))
 
-                with col2:
-                    goal_weight = st.number_input("목표 체중 (kg)", min_value=30, max_value=200, 
-                                     value=existing_data.get("목표 체중", 60))
+        st.markdown("---")  # 구분선 추가
 
-    st.markdown("---")  # 구분선 추가
+        # ✅ 혈압 및 콜레스테롤 입력
+        st.header("🩸 혈압, 혈당 및 콜레스테롤")
+        col1, col2 = st.columns(2)
+        with col1:
+            systolic_bp = st.number_input("수축기혈압 (최고 혈압)/ **정상 수치 120mmHg 미만**", min_value=80, max_value=200,
+                                          value=default("수축기혈압(최고 혈압)", 120))
+            diastolic_bp = st.number_input("이완기혈압 (최저 혈압)/ **정상 수치 80mmHg 미만** ", min_value=40, max_value=130,
+                                           value=default("이완기혈압(최저 혈압)", 80))
+        with col2:
+            hdl = st.number_input("HDL 콜레스테롤/ **정상 수치 남자 40mg/dL이상, 여자 50mg/dL이상**", min_value=20, max_value=100,
+                                  value=default("HDL콜레스테롤", 50))
+            ldl = st.number_input("LDL 콜레스테롤/ **정상 수치 90~130mg/dL** ", min_value=50, max_value=200,
+                                  value=default("LDL콜레스테롤", 100))
 
-    # ✅ 혈압 및 콜레스테롤 입력
-    st.header("🩸 혈압, 혈당 및 콜레스테롤")
-    with st.container():
-            col1, col2 = st.columns(2)
-            with col1:
-                systolic_bp = st.number_input("수축기혈압 (최고 혈압)/ **정상 수치 120mmHg 미만**", min_value=80, max_value=200,
-                                         value=existing_data.get("수축기혈압", 120))
-                diastolic_bp = st.number_input("이완기혈압 (최저 혈압)/ **정상 수치 80mmHg 미만** ", min_value=40, max_value=130,
-                                          value=existing_data.get("이완기혈압", 80))
-            with col2:
-                hdl = st.number_input("HDL 콜레스테롤/ **정상 수치 남자 40mg/dL이상, 여자 50mg/dL이상**", min_value=20, max_value=100,
-                                  value=existing_data.get("HDL콜레스테롤", 50))
-                ldl = st.number_input("LDL 콜레스테롤/ **정상 수치 90~130mg/dL** ", min_value=50, max_value=200,
-                                  value=existing_data.get("LDL콜레스테롤", 100))
-            
-            st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
-            with st.container():
-                col1, col2= st.columns(2)
-                with col1:
-                   fasting_glucose = st.number_input("식전혈당 (mg/dL)/ **정상 수치 70~110mg/dL**",
-                                                 min_value=50, max_value=300,
-                                                 value=existing_data.get("식전혈당", 90))
-                with col2:
-                    triglyceride = st.number_input("트리글리세라이드(중성지방)/ **정상 수치 150mg/dL 미만**", min_value=50, max_value=500, 
-                                                   value=existing_data.get("트리글리세라이드", 150))
+        st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
+        col1, col2 = st.columns(2)
+        with col1:
+            fasting_glucose = st.number_input("식전혈당 (mg/dL)/ **정상 수치 70~110mg/dL**",
+                                              min_value=50, max_value=300,
+                                              value=default("식전혈당(공복혈당)", 90))
+        with col2:
+            triglyceride = st.number_input("트리글리세라이드(중성지방)/ **정상 수치 150mg/dL 미만**", min_value=50, max_value=500,
+                                           value=default("트리글리세라이드", 150))
 
-    st.markdown("---")  # 구분선 추가
+        st.markdown("---")  # 구분선 추가
 
-    # ✅ 생활 습관 입력
-    st.header("🏃‍♂️ 생활 습관")
-    with st.container():
-            col1, col2 = st.columns(2)
-            with col1:
-                smoking_status = st.selectbox(" 흡연 상태", ['비흡연', '과거 흡연', '현재 흡연'],
-                                              index=['비흡연', '과거 흡연', '현재 흡연'].index(
-                                                  existing_data.get("흡연상태", "비흡연")))
-            with col2:
-                alcohol_status = st.selectbox("음주 여부", ['비음주', '가끔', '자주'],
-                                              index=['비음주', '가끔', '자주'].index(existing_data.get("음주여부", "비음주")))
-            
-            st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
-            with st.container():
-                activity_level = st.selectbox("활동 수준", ["저활동", "중간활동", "고활동"],
-                                              index=["저활동", "중간활동", "고활동"].index(existing_data.get("활동 수준", "저활동")))
+        # ✅ 생활 습관 입력
+        st.header("🏃‍♂️ 생활 습관")
+        col1, col2 = st.columns(2)
+        with col1:
+            smoking_status = st.selectbox(" 흡연 상태", ['비흡연', '과거 흡연', '현재 흡연'],
+                                          index=['비흡연', '과거 흡연', '현재 흡연'].index(
+                                              existing_data.get("흡연상태", "비흡연")))
+        with col2:
+            alcohol_status = st.selectbox("음주 여부", ['비음주', '가끔', '자주'],
+                                          index=['비음주', '가끔', '자주'].index(existing_data.get("음주여부", "비음주")))
 
-    # ✅ 자동 계산된 지표 추가
-    bmi = round(weight / ((height / 100) ** 2), 2) if height > 0 else 0.0
-    total_cholesterol = ldl + hdl + triglyceride
-    blood_pressure_diff = systolic_bp - diastolic_bp
+        st.markdown("<br>", unsafe_allow_html=True)  # 간격 추가
+        activity_level = st.selectbox("활동 수준", ["저활동", "중간활동", "고활동"],
+                                      index=["저활동", "중간활동", "고활동"].index(existing_data.get("활동 수준", "저활동")))
 
-    liver_health_index = round(
-        (existing_data.get("혈청지오티(AST)", 30) + existing_data.get("혈청지피티(ALT)", 40) + existing_data.get("감마지티피", 50)) / 3, 2
-    )
+        # 데이터 저장 버튼 (폼 제출)
+        submitted = st.form_submit_button("✅ 저장하기")
 
-    obesity_risk_index = round(waist / bmi, 2) if bmi > 0 else 0.0
+    if not submitted:
+        display_preview(existing_data)
+        return None
 
-    # ✅ 사용자 데이터 저장
+    # ✅ 사용자 데이터 저장 (파생 지표는 제출 시에만 계산)
     user_data = {
         "user_id": user_id,
         "성별": gender,
@@ -220,100 +279,14 @@ def get_user_input(existing_data, user_id):
         "수축기혈압(최고 혈압)": systolic_bp,
         "이완기혈압(최저 혈압)": diastolic_bp,
         "식전혈당(공복혈당)": fasting_glucose,
-        "혈압 차이": blood_pressure_diff,
         "HDL콜레스테롤": hdl,
         "LDL콜레스테롤": ldl,
         "트리글리세라이드": triglyceride,
-        "총콜레스테롤": total_cholesterol,
-        "간 지표": liver_health_index,
-        "BMI": round(bmi, 2),
-        "비만 위험 지수": obesity_risk_index,
         "흡연상태": smoking_status,
         "음주여부": alcohol_status,
         "활동 수준": activity_level
     }
+    user_data.update(calculate_derived_metrics(user_data, existing_data))
 
-    # ✅ 입력한 데이터 미리보기
-    st.markdown("<h4 style='text-align: center; color: #1f618d;'>🔍 입력한 데이터 미리보기</h4>", unsafe_allow_html=True)
-    
-    selected_columns = ["user_id", "성별", "나이", "허리둘레", "BMI", "총콜레스테롤", "혈압 차이", "식전혈당(공복혈당)", "간 지표", "비만 위험 지수", "활동 수준"]
-    # 컬럼 이름 변경 (줄 바꿈 추가)
- 
-
-
-
-    df_selected = pd.DataFrame([{col: user_data[col] for col in selected_columns}])
-
-    # 특정 컬럼 소수점 2자리 유지
-    for col in ["BMI", "비만 위험 지수", "간 지표"]:
-        df_selected[col] = df_selected[col].apply(lambda x: f"{x:.2f}")
-        
-    df_selected = pd.DataFrame([{col: user_data[col] for col in selected_columns}])
-
-    # 컬럼 이름 변경 (줄 바꿈 추가)
-    selected_columns = [
-        "user_id", "성별", "나이", "허리둘레", "BMI", "총콜레스테롤", "혈압 차이", 
-        "식전혈당\n(공복혈당)", "간 지표", "비만 위험\n지수", "활동 수준"
-]
-
-
-    # 스타일링을 위한 CSS
-    st.markdown("""
-    <style>
-        .dataframe {
-            border-collapse: separate;
-            border-spacing: 0;
-            width: 100%;
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            font-size: 0.9em;
-            box-shadow: 0 2px 15px rgba(64,64,64,.1);
-            border-radius: 12px;
-            overflow: hidden;
-        }
-        .dataframe thead tr {
-            background-color: #3498db;
-            color: #ffffff;
-            text-align: left;
-        }
-        .dataframe th, .dataframe td {
-            padding: 12px 15px;
-        }
-        .dataframe th {
-            font-weight: 600;
-            text-transform: uppercase;
-            font-size: 0.85em;
-            letter-spacing: 0.5px;
-        }
-        .dataframe tbody tr {
-            transition: background-color 0.3s ease;
-        }
-        .dataframe tbody tr:hover {
-            background-color: rgba(52, 152, 219, 0.1);
-        }
-        .dataframe tbody tr:nth-of-type(even) {
-            background-color: #f8f9fa;
-        }
-        .dataframe tbody td {
-            border-bottom: 1px solid #e9ecef;
-        }
-        .dataframe tbody tr:last-of-type td {
-            border-bottom: none;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-
-
-    # 데이터프레임을 HTML 테이블로 변환
-    html_table = df_selected.to_html(index=False, classes='dataframe')
-    st.markdown(html_table, unsafe_allow_html=True)
-
-    # 데이터 저장 버튼
-    if st.button("✅ 저장하기"):
-        if "data_saved" not in st.session_state:  # 상태가 없으면 저장
-            save_user_data(user_id, user_data)  # 기존 데이터 덮어쓰기
-            st.session_state["data_saved"] = True
-            st.success("✅ 데이터가 성공적으로 저장되었습니다!")
-        
-     
-
-    return user_data
\ No newline at end of file
+    display_preview(user_data)
+    return user_data
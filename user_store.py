@@ -0,0 +1,118 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+
+# SQLite 사용자 저장소 경로
+USER_DB_FILE = os.getenv("USER_DB_FILE", "data/user_data.db")
+# 최초 1회 마이그레이션할 기존 JSON 파일
+LEGACY_USER_DATA_FILE = "data/user_data.json"
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id    TEXT PRIMARY KEY,
+    data       TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def get_connection(db_path=USER_DB_FILE):
+    """
+    📌 스레드별 SQLite 연결을 반환합니다. (WAL 모드)
+    처음 연결하는 경로는 스키마를 만들고 JSON 데이터를 마이그레이션합니다.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[db_path] = conn
+        _initialize(conn, db_path)
+    return conn
+
+
+def _initialize(conn, db_path):
+    with _init_lock:
+        if db_path in _initialized_paths:
+            return
+        with conn:
+            conn.executescript(_SCHEMA)
+        migrate_from_json(LEGACY_USER_DATA_FILE, conn)
+        _initialized_paths.add(db_path)
+
+
+def migrate_from_json(json_path, conn):
+    """
+    📌 기존 user_data.json의 사용자들을 한 번만 SQLite로 옮깁니다.
+    이미 마이그레이션했거나 파일이 없으면 아무것도 하지 않습니다. 옮긴 사용자 수를 반환합니다.
+    """
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+        return 0
+    users = {}
+    if os.path.exists(json_path):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                users = json.load(f)
+        except json.JSONDecodeError:
+            logging.error(f"🚨 사용자 데이터 파일({json_path})이 손상되어 마이그레이션을 건너뜁니다.")
+            return 0
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, data) VALUES (?, ?)",
+            [(str(user_id), json.dumps(data, ensure_ascii=False)) for user_id, data in users.items()],
+        )
+        conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (json_path,))
+    logging.info(f"✅ 사용자 {len(users)}명을 {json_path}에서 SQLite로 마이그레이션했습니다.")
+    return len(users)
+
+
+def get_user(user_id):
+    """📌 사용자 한 명의 데이터를 반환합니다. 없으면 None"""
+    row = get_connection().execute("SELECT data FROM users WHERE user_id = ?", (str(user_id),)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def get_user_version(user_id):
+    """
+    📌 사용자 행의 버전 토큰 (updated_at, 데이터 길이) — 기본 키 조회 한 번, 데이터는 파싱하지 않음.
+    다른 프로세스가 저장해도 바뀌므로 캐시 유효성 확인에 사용합니다. 사용자가 없으면 None
+    """
+    return get_connection().execute(
+        "SELECT updated_at, length(data) FROM users WHERE user_id = ?", (str(user_id),)
+    ).fetchone()
+
+
+def get_all_users():
+    """📌 전체 사용자 {user_id: data} 매핑을 반환합니다."""
+    rows = get_connection().execute("SELECT user_id, data FROM users").fetchall()
+    return {user_id: json.loads(data) for user_id, data in rows}
+
+
+def upsert_user(user_id, data):
+    """📌 사용자 한 명의 행만 추가/갱신합니다."""
+    upsert_users({user_id: data})
+
+
+def upsert_users(users):
+    """📌 여러 사용자를 한 트랜잭션으로 추가/갱신합니다."""
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, data, updated_at) VALUES (?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now')) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            [(str(user_id), json.dumps(data, ensure_ascii=False)) for user_id, data in users.items()],
+        )
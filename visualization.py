@@ -1,10 +1,234 @@
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import re
+import plotly.io as pio
+from cache_utils import LRUCache
+from prediction_log import history_version
+from prediction_store import age_group_dtype, load_predictions, load_predictions_versioned, sort_age_groups
+from prediction_aggregates import aggregates_version, group_summary, histogram, load_aggregates
 
-# 예측 데이터 저장 파일 경로
-PREDICTION_FILE = "data/predictions.csv"
+# 산점도에 필요한 컬럼만 읽음 (막대/선/히스토그램은 집계 저장소 사용)
+SCATTER_COLUMNS = ["BMI", "운동 점수", "식단 점수"]
+# 산점도 행 수가 이 값을 넘으면 점 대신 격자 밀도(BMI 구간 × 점수 구간)로 그림
+SCATTER_MAX_POINTS = int(os.getenv("SCATTER_MAX_POINTS", "5000"))
+SCATTER_GRID_BINS = (60, 40)
+
+# 연령대별 상세 테이블 (코호트 탐색): 한 번에 보여줄 행 수와 컬럼
+# 선택한 연령대 파티션에서 아래 컬럼만 읽음 (표시/필터/정렬 대상)
+COHORT_PAGE_SIZES = [25, 50, 100]
+COHORT_DEFAULT_COLUMNS = ["user_id", "성별", "나이", "BMI", "활동 수준", "운동 점수", "식단 점수", "예측 날짜"]
+COHORT_COLUMNS = COHORT_DEFAULT_COLUMNS + [
+    "현재 체중", "목표 체중", "허리둘레", "수축기혈압(최고 혈압)", "이완기혈압(최저 혈압)", "총콜레스테롤",
+]
+COHORT_SCORE_COLUMNS = ["운동 점수", "식단 점수"]
+COHORT_SCORE_RANGE = (0, 100)
+# 파티션 읽기 순서와 무관한 기본 행 순서
+COHORT_ORDER_COLUMNS = ["예측 날짜", "user_id"]
+_cohort_indexes = LRUCache(max_entries=4)
+
+# 렌더링된 Figure(JSON spec) 캐시: 세션 간 공유, 전체 크기 한도 안에서 LRU로 제거
+FIGURE_CACHE_MAX_BYTES = int(os.getenv("FIGURE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+figure_cache = LRUCache(max_entries=256, max_bytes=FIGURE_CACHE_MAX_BYTES)
+
+
+def histogram_figure(column, title):
+    """집계된 고정 구간 건수로 히스토그램 모양의 막대 그래프를 만듭니다."""
+    edges, counts = histogram(column)
+    bins = pd.DataFrame({
+        column: (edges[:-1] + edges[1:]) / 2,
+        "빈도": counts,
+    })
+    fig = px.bar(bins, x=column, y="빈도", title=title)
+    fig.update_traces(width=edges[1] - edges[0])
+    fig.update_layout(bargap=0)
+    return fig
+
+
+def gender_exercise_figure():
+    gender_ex = pd.DataFrame(group_summary("성별", "운동 점수"), columns=["성별", "운동 점수"])
+    return px.bar(
+        gender_ex,
+        x="성별",
+        y="운동 점수",
+        color="성별",
+        title="성별별 평균 운동 점수",
+        labels={"운동 점수": "평균 운동 점수"}
+    )
+
+
+def age_diet_figure():
+    age_diet = pd.DataFrame(group_summary("연령대", "식단 점수"), columns=["연령대", "식단 점수"])
+    # 연령대 순 정렬: 순서 있는 범주 타입 사용
+    age_diet["연령대"] = age_diet["연령대"].astype(age_group_dtype(age_diet["연령대"]))
+    age_diet = age_diet.sort_values("연령대")
+    age_diet["연령대"] = age_diet["연령대"].astype(str)
+    return px.line(
+        age_diet,
+        x="연령대",
+        y="식단 점수",
+        title="연령대별 평균 식단 점수",
+        markers=True,
+        labels={"식단 점수": "평균 식단 점수"}
+    )
+
+
+def _grid_edges(values, n_bins):
+    low, high = float(values.min()), float(values.max())
+    if high <= low:  # 모든 값이 같으면 폭 1짜리 구간
+        high = low + 1.0
+    return np.linspace(low, high, n_bins + 1)
+
+
+def density_grid(df, x, series, bins=None):
+    """
+    📌 산점도 대신 2D 격자 밀도를 계산합니다. (np.histogram2d)
+    series별로 점이 있는 격자 칸의 중심 좌표와 건수만 반환하므로, 결과 크기는 행 수가 아니라 격자 칸 수에 비례합니다.
+    """
+    bins = bins or SCATTER_GRID_BINS
+    x_values = df[x].to_numpy(dtype=float)
+    x_edges = _grid_edges(x_values, bins[0])
+    cells = []
+    for name in series:
+        y_values = df[name].to_numpy(dtype=float)
+        y_edges = _grid_edges(y_values, bins[1])
+        counts, _, _ = np.histogram2d(x_values, y_values, bins=[x_edges, y_edges])
+        ix, iy = np.nonzero(counts)
+        cells.append(pd.DataFrame({
+            x: (x_edges[ix] + x_edges[ix + 1]) / 2,
+            "점수": (y_edges[iy] + y_edges[iy + 1]) / 2,
+            "건수": counts[ix, iy].astype(int),
+            "구분": name,
+        }))
+    return pd.concat(cells, ignore_index=True)
+
+
+def bmi_scatter_figure():
+    df = load_predictions(columns=SCATTER_COLUMNS).fillna(0)
+    if len(df) > SCATTER_MAX_POINTS:
+        # 행이 많으면 서버에서 격자로 묶어 칸별 건수를 점 크기로 표시
+        grid = density_grid(df, "BMI", ["운동 점수", "식단 점수"])
+        return px.scatter(
+            grid,
+            x="BMI",
+            y="점수",
+            size="건수",
+            color="구분",
+            title=f"BMI별 운동/식단 점수 (전체 {len(df):,}건, 격자 밀도)",
+            render_mode="webgl",
+        )
+    return px.scatter(
+        df,
+        x="BMI",
+        y=["운동 점수", "식단 점수"],
+        title="BMI별 운동/식단 점수",
+        labels={"value": "점수", "variable": "구분"},
+        render_mode="webgl",
+    )
+
+
+def cached_figure(chart_id, data_version, build):
+    """
+    📌 (차트 id, 데이터 버전) 단위로 직렬화된 Figure를 캐시합니다. (세션 간 공유)
+    데이터가 바뀌지 않았으면 pandas/Plotly 파이프라인 없이 캐시된 spec을 그대로 사용합니다.
+    """
+    key = (chart_id, data_version)
+    spec = figure_cache.get(key)
+    if spec is None:
+        spec = build().to_json()
+        figure_cache.put(key, spec)
+    return pio.from_json(spec, skip_invalid=True)
+
+
+def cohort_index(df, version, age_group):
+    """
+    📌 한 연령대 DataFrame의 행 위치 배열 (예측 날짜, user_id 순 — 파티션 읽기 순서와 무관)
+    df는 load_predictions_versioned가 version 토큰과 함께 반환한 DataFrame이어야 합니다.
+    """
+    key = (version, str(age_group))
+    rows = _cohort_indexes.get(key)
+    if rows is None:
+        order_columns = [column for column in COHORT_ORDER_COLUMNS if column in df.columns]
+        ordered = df.reset_index(drop=True).sort_values(order_columns, na_position="last", kind="stable")
+        rows = ordered.index.to_numpy()
+        _cohort_indexes.put(key, rows)
+    return rows
+
+
+def filter_cohort(df, rows, genders=None, activities=None, score_ranges=None, sort_by=None, ascending=True):
+    """
+    📌 한 코호트(행 위치 배열)에 필터와 정렬을 적용한 행 위치 배열을 반환합니다.
+    전체 데이터가 아니라 코호트 행의 값만 비교/정렬합니다.
+    """
+    mask = np.ones(len(rows), dtype=bool)
+    for column, allowed in (("성별", genders), ("활동 수준", activities)):
+        if allowed:
+            mask &= df[column].take(rows).isin(allowed).to_numpy()
+    for column, (low, high) in (score_ranges or {}).items():
+        if (low, high) == COHORT_SCORE_RANGE:
+            continue  # 범위를 좁히지 않았으면 점수가 없는 행도 그대로 표시
+        values = df[column].to_numpy(dtype="float64", na_value=np.nan)[rows]
+        mask &= (values >= low) & (values <= high)
+    rows = rows[mask]
+
+    if sort_by:
+        keys = df[sort_by].take(rows).reset_index(drop=True)
+        order = keys.sort_values(ascending=ascending, na_position="last", kind="stable").index.to_numpy()
+        rows = rows[order]
+    return rows
+
+
+def cohort_page(df, rows, page=1, page_size=COHORT_PAGE_SIZES[0], columns=None):
+    """📌 행 위치 배열에서 한 페이지(최대 page_size행)만 선택한 컬럼으로 만듭니다."""
+    start = (page - 1) * page_size
+    return df.iloc[rows[start:start + page_size]][columns or list(df.columns)].reset_index(drop=True)
+
+
+def display_cohort_explorer(selected_age):
+    """📌 선택한 연령대의 예측 기록을 필터/정렬/페이지 단위로 보여줍니다."""
+    # 선택한 연령대 파티션만, 필요한 컬럼만 읽음
+    df, version = load_predictions_versioned(
+        columns=COHORT_COLUMNS, filters=[("연령대", "==", str(selected_age))]
+    )
+    rows = cohort_index(df, version, selected_age)
+    if len(rows) == 0:
+        st.info("선택한 연령대의 데이터가 없습니다.")
+        return
+
+    st.write(f"### 선택한 연령대: {selected_age}")
+    col1, col2 = st.columns(2)
+    with col1:
+        genders = st.multiselect("성별", list(df["성별"].cat.categories), key="cohort_gender")
+        activities = st.multiselect("활동 수준", list(df["활동 수준"].cat.categories), key="cohort_activity")
+    with col2:
+        score_ranges = {
+            column: st.slider(f"{column} 범위", *COHORT_SCORE_RANGE, COHORT_SCORE_RANGE, key=f"cohort_{column}")
+            for column in COHORT_SCORE_COLUMNS
+        }
+    columns = st.multiselect(
+        "표시할 컬럼", list(df.columns),
+        default=[column for column in COHORT_DEFAULT_COLUMNS if column in df.columns], key="cohort_columns",
+    )
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_by = st.selectbox("정렬 기준", ["(없음)"] + list(df.columns), key="cohort_sort")
+    with col2:
+        ascending = st.radio("정렬 방향", ["오름차순", "내림차순"], horizontal=True, key="cohort_order") == "오름차순"
+    with col3:
+        page_size = st.selectbox("페이지당 행 수", COHORT_PAGE_SIZES, key="cohort_page_size")
+
+    rows = filter_cohort(df, rows, genders=genders, activities=activities, score_ranges=score_ranges,
+                         sort_by=None if sort_by == "(없음)" else sort_by, ascending=ascending)
+    if len(rows) == 0:
+        st.info("조건에 맞는 데이터가 없습니다.")
+        return
+    pages = (len(rows) - 1) // page_size + 1
+    page = st.number_input(f"페이지 (1~{pages})", min_value=1, max_value=pages, value=1, key="cohort_page")
+    page_df = cohort_page(df, rows, page=page, page_size=page_size, columns=columns)
+    start = (page - 1) * page_size
+    st.caption(f"전체 {len(rows):,}건 중 {start + 1:,}–{start + len(page_df):,}번째")
+    st.dataframe(page_df)
 
 
 def display_visualization_page():
@@ -12,80 +236,40 @@ def display_visualization_page():
     st.header("📊 예측 데이터 시각화")
 
     try:
-        df = pd.read_csv(PREDICTION_FILE)
+        aggregates = load_aggregates()
 
         # 데이터가 없는 경우 메시지 표시
-        if df.empty:
+        if aggregates["rows"] == 0:
             st.warning("예측 데이터가 없습니다. 먼저 예측을 실행해주세요.")
             return
 
-        # 데이터 타입 변환 & 결측치 처리
-        df["나이"] = pd.to_numeric(df["나이"], errors="coerce").fillna(0).astype(int)
-        df["운동 점수"] = pd.to_numeric(df["운동 점수"], errors="coerce").fillna(0)
-        df["식단 점수"] = pd.to_numeric(df["식단 점수"], errors="coerce").fillna(0)
-        df["BMI"] = pd.to_numeric(df["BMI"], errors="coerce").fillna(0)
-        df.fillna(0, inplace=True)
+        # 차트별 데이터 버전: 집계 차트는 집계 파일, 산점도는 예측 히스토리 기준
+        aggregate_version = aggregates_version()
+        rows_version = history_version()
 
         # 1) 성별별 평균 운동 점수 (Bar)
         st.subheader("🧑‍🤝‍🧑 성별에 따른 운동 가능성")
-        gender_ex = df.groupby("성별")["운동 점수"].mean().reset_index()
-        fig1 = px.bar(
-            gender_ex,
-            x="성별",
-            y="운동 점수",
-            color="성별",
-            title="성별별 평균 운동 점수",
-            labels={"운동 점수": "평균 운동 점수"}
-        )
+        fig1 = cached_figure("gender_exercise", aggregate_version, gender_exercise_figure)
         st.plotly_chart(fig1, use_container_width=True)
 
         # 2) 연령대별 평균 식단 점수 (Line)
         st.subheader("👵👴 연령대에 따른 식단 개선 필요성")
-        age_diet = df.groupby("연령대")["식단 점수"].mean().reset_index()
-        # 연령대 순 정렬: 숫자 부분 추출
-        age_diet["order"] = age_diet["연령대"].apply(lambda x: int(re.search(r"(\d+)", str(x)).group()))
-        age_diet = age_diet.sort_values("order")
-        fig2 = px.line(
-            age_diet,
-            x="연령대",
-            y="식단 점수",
-            title="연령대별 평균 식단 점수",
-            markers=True,
-            labels={"식단 점수": "평균 식단 점수"}
-        )
+        fig2 = cached_figure("age_diet", aggregate_version, age_diet_figure)
         st.plotly_chart(fig2, use_container_width=True)
 
         # 3) BMI별 운동 & 식단 점수 비교 (Scatter)
         st.subheader("💪🥗 BMI에 따른 운동 및 식단 점수 비교")
-        fig3 = px.scatter(
-            df,
-            x="BMI",
-            y=["운동 점수", "식단 점수"],
-            title="BMI별 운동/식단 점수",
-            labels={"value": "점수", "variable": "구분"}
-        )
+        fig3 = cached_figure("bmi_scatter", rows_version, bmi_scatter_figure)
         st.plotly_chart(fig3, use_container_width=True)
 
         # 4) 운동 점수 분포 (Histogram)
         st.subheader("🏃‍♂️ 운동 점수 분포")
-        fig4 = px.histogram(
-            df,
-            x="운동 점수",
-            nbins=10,
-            title="운동 점수 분포",
-            labels={"운동 점수": "운동 점수", "count": "빈도"}
-        )
+        fig4 = cached_figure("exercise_histogram", aggregate_version, lambda: histogram_figure("운동 점수", "운동 점수 분포"))
         st.plotly_chart(fig4, use_container_width=True)
 
         # 5) 식단 점수 분포 (Histogram)
         st.subheader("🍏 식단 점수 분포")
-        fig5 = px.histogram(
-            df,
-            x="식단 점수",
-            nbins=10,
-            title="식단 점수 분포",
-            labels={"식단 점수": "식단 점수", "count": "빈도"}
-        )
+        fig5 = cached_figure("diet_histogram", aggregate_version, lambda: histogram_figure("식단 점수", "식단 점수 분포"))
         st.plotly_chart(fig5, use_container_width=True)
 
         # 추가 설명 마크다운
@@ -102,15 +286,9 @@ def display_visualization_page():
 
         # 6) 사용자 지정 시각화: 연령대 선택
         st.subheader("✨ 사용자 지정 시각화: 연령대별 데이터 보기")
-        unique_ages = df["연령대"].dropna().unique().tolist()
-        unique_ages.sort(key=lambda x: int(re.search(r"(\d+)", str(x)).group()))
+        unique_ages = sort_age_groups(aggregates["groups"]["연령대"])
         selected_age = st.selectbox("연령대 선택", unique_ages)
-        filtered = df[df["연령대"] == selected_age]
-        if not filtered.empty:
-            st.write(f"### 선택한 연령대: {selected_age}")
-            st.dataframe(filtered)
-        else:
-            st.info("선택한 연령대의 데이터가 없습니다.")
+        display_cohort_explorer(selected_age)
 
     except FileNotFoundError:
         st.error("🚨 예측 데이터 파일이 없습니다. 먼저 예측을 실행해주세요.")